@@ -1,49 +1,72 @@
 # api/anilist.py
 from config import ANILIST_URL
 
-class AniListMixin:
-    async def get_anilist_season_data(self, title, season_num):
-        query = """
-        query ($search: String) {
-          Media (search: $search, type: ANIME, sort: SEARCH_MATCH) {
+MEDIA_FIELDS = """
             description
             averageScore
             coverImage {
               extraLarge
             }
-          }
-        }
-        """
+"""
 
+class AniListMixin:
+    def _season_search_terms(self, title, season_num):
         search_terms = []
         if season_num > 1:
             search_terms.append(f"{title} Season {season_num}")
             search_terms.append(f"{title} {season_num}")
         else:
             search_terms.append(f"{title}")
+        return search_terms
+
+    def _normalize_anilist_media(self, data):
+        desc = data.get('description', '')
+        if desc:
+            desc = desc.replace('<br>', '\n').replace('<i>', '').replace('</i>', '')
         
-        for term in search_terms:
-            try:
-                resp = await self.client.post(
-                    ANILIST_URL, 
-                    json={'query': query, 'variables': {'search': term}}
+        score = data.get('averageScore')
+        if score: score = score / 10.0
+
+        return {
+            "poster": (data.get('coverImage') or {}).get('extraLarge'),
+            "overview": desc,
+            "rating": score 
+        }
+
+    async def get_anilist_all_seasons_data(self, title, season_nums):
+        """
+        AniList poster / overview / rating for every season in a single POST:
+        every search term of every season becomes an aliased Media field of one
+        GraphQL document, the first term that matches wins. Returns {season: {...}}.
+        """
+        variables = {}
+        fields = []
+        aliases = {}  # season -> aliases in the order we prefer them
+        for s_num in season_nums:
+            for i, term in enumerate(self._season_search_terms(title, s_num)):
+                alias = f"s{s_num}_{i}"
+                variables[alias] = term
+                aliases.setdefault(s_num, []).append(alias)
+                fields.append(
+                    f"{alias}: Media (search: ${alias}, type: ANIME, sort: SEARCH_MATCH) {{{MEDIA_FIELDS}}}"
                 )
-                
-                if resp.status_code == 200:
-                    data = resp.json().get('data', {}).get('Media')
-                    if data:
-                        desc = data.get('description', '')
-                        if desc:
-                            desc = desc.replace('<br>', '\n').replace('<i>', '').replace('</i>', '')
-                        
-                        score = data.get('averageScore')
-                        if score: score = score / 10.0
-
-                        return {
-                            "poster": data.get('coverImage', {}).get('extraLarge'),
-                            "overview": desc,
-                            "rating": score 
-                        }
-            except:
-                pass
-        return None
+        if not fields: return {}
+
+        params = ", ".join(f"${a}: String" for a in variables)
+        query = f"query ({params}) {{\n" + "\n".join(fields) + "\n}"
+
+        try:
+            resp = await self.client.post(ANILIST_URL, json={'query': query, 'variables': variables})
+            # AniList answers 404 with partial data when some aliases match nothing
+            # (the HTTP cache keeps those, see api.http_cache.is_cacheable)
+            data = resp.json().get('data') or {}
+        except:
+            return {}
+
+        results = {}
+        for s_num, season_aliases in aliases.items():
+            for alias in season_aliases:
+                if data.get(alias):
+                    results[s_num] = self._normalize_anilist_media(data[alias])
+                    break
+        return results
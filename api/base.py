@@ -1,14 +1,117 @@
-# api/base.py
+import asyncio
 import httpx
-from config import HEADERS
+from config import HEADERS, HTTP_CACHE_FILE, HTTP_CACHE_MAX_BYTES
+from api.http_cache import ResponseCache, CachingTransport
+from api.scheduler import SchedulingTransport, flight_context, join_lane
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one.
+    The first caller for a key starts the work; anyone asking for the same
+    key while it runs awaits that same result instead of starting another.
+    The work is only cancelled once every caller waiting on it has gone.
+    A caller in a more urgent lane than the one that started the work moves
+    it (and the requests it still has to make) up to its own lane.
+    """
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        entry = self._inflight.get(key)
+        if entry is None:
+            ctx, lane = flight_context()
+            task = asyncio.get_running_loop().create_task(fn(*args, **kwargs), context=ctx)
+            entry = [task, 0, lane]
+            self._inflight[key] = entry
+            task.add_done_callback(lambda _, key=key, entry=entry: self._forget(key, entry))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+            join_lane(entry[2])
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
+                # The task only finishes on a later tick; whoever asks before
+                # that must start fresh work, not join the cancelled one
+                self._forget(key, entry)
+
+    def _forget(self, key, entry):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def stats(self):
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+
+class CoalescingTransport(httpx.AsyncBaseTransport):
+    """
+    Shares one network call between identical concurrent requests
+    (same method, URL and body). Each caller gets its own Response
+    built from the shared status, headers and body.
+    """
+    def __init__(self, transport):
+        self._transport = transport
+        self.flight = SingleFlight()
+
+    async def handle_async_request(self, request):
+        # Every POST this app makes is a read (AniList GraphQL), so it is safe to share
+        if request.method not in ("GET", "HEAD", "POST"):
+            return await self._transport.handle_async_request(request)
+
+        body = await request.aread()
+        key = (request.method, str(request.url), body)
+        status, headers, content = await self.flight.do(key, self._send, request)
+        return httpx.Response(status_code=status, headers=headers, content=content, request=request)
+
+    async def _send(self, request):
+        response = await self._transport.handle_async_request(request)
+        content = await response.aread()
+        headers = [(k, v) for k, v in response.headers.multi_items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return response.status_code, headers, content
+
+    async def aclose(self):
+        await self._transport.aclose()
+
 
 class BaseClient:
     """
     Handles the raw HTTP connection. 
     Other API modules will inherit from this or use it.
+    All requests go through an on-disk response cache (see api/http_cache.py)
+    identical in-flight requests share a single network call, and each host
+    gets a rate-limited queue where interactive requests go first.
     """
     def __init__(self):
-        self.client = httpx.AsyncClient(headers=HEADERS, timeout=15.0)
+        self.cache = ResponseCache(HTTP_CACHE_FILE, HTTP_CACHE_MAX_BYTES)
+        # coalescing -> disk cache -> per-host rate limits -> network
+        self.scheduler = SchedulingTransport(httpx.AsyncHTTPTransport())
+        self.transport = CachingTransport(self.scheduler, self.cache)
+        self.coalescer = CoalescingTransport(self.transport)
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=15.0,
+            transport=self.coalescer,
+            follow_redirects=True,
+        )
+
+    def request_stats(self):
+        stats = self.coalescer.flight.stats()
+        stats.update({
+            "cache_hits": self.transport.hits,
+            "cache_misses": self.transport.misses,
+            "cache_revalidated": self.transport.revalidated,
+        })
+        stats.update(self.scheduler.stats())
+        return stats
 
     async def close(self):
         await self.client.aclose()
@@ -1,5 +1,12 @@
 # api/cinemeta.py
 from config import CINEMETA_URL, CINEMETA_CATALOG_URL
+from api.scheduler import current_lane, PRIORITY_INTERACTIVE
+
+def _log_error(line):
+    # Background refreshes (the catalog index) fail quietly; they retry later anyway
+    if current_lane() != PRIORITY_INTERACTIVE: return
+    with open("debug_error.log", "a") as f:
+        f.write(line + "\n")
 
 class CinemetaMixin:
     async def get_series_details_cinemeta(self, imdb_id: str, type_: str = "series"):
@@ -13,14 +20,18 @@ class CinemetaMixin:
             pass
         return {}
 
-    async def get_catalog_cinemeta(self, type_: str, id_: str = "top"):
+    async def get_catalog_cinemeta(self, type_: str, id_: str = "top", skip: int = 0):
         """
         Fetches a catalog (list of items).
         type_: 'movie' or 'series'
         id_: 'top' (Popular), 'imdbRating' (Top Rated)
+        skip: number of items to skip, for paging
         """
         try:
-            url = f"{CINEMETA_CATALOG_URL}/{type_}/{id_}.json"
+            if skip:
+                url = f"{CINEMETA_CATALOG_URL}/{type_}/{id_}/skip={skip}.json"
+            else:
+                url = f"{CINEMETA_CATALOG_URL}/{type_}/{id_}.json"
             
             # FIX 2: Add follow_redirects=True here too
             resp = await self.client.get(url, follow_redirects=True)
@@ -44,11 +55,8 @@ class CinemetaMixin:
                         })
                 return results
             else:
-                with open("debug_error.log", "a") as f:
-                    f.write(f"Cinemeta HTTP Error: {resp.status_code}\n")
+                _log_error(f"Cinemeta HTTP Error: {resp.status_code}")
                     
         except Exception as e:
-            with open("debug_error.log", "a") as f:
-                f.write(f"Cinemeta Exception: {str(e)}\n")
-            pass
+            _log_error(f"Cinemeta Exception: {str(e)}")
         return []
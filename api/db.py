@@ -0,0 +1,28 @@
+# api/db.py
+import os
+import sqlite3
+
+
+def connect(path):
+    """Connection to the SQLite file at `path` in WAL mode, usable from any thread."""
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+def open_db(path, setup=None):
+    """
+    connect() for the on-disk stores: creates the folder and runs
+    setup(db) (the schema) first. Returns None if the file can't be used
+    (read-only home, corrupt file, ...); the store then runs without it.
+    """
+    db = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = connect(path)
+        if setup: setup(db)
+        return db
+    except (OSError, sqlite3.Error):
+        if db: db.close()
+        return None
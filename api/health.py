@@ -0,0 +1,64 @@
+# api/health.py
+import time
+from collections import deque
+
+from config import PROVIDER_BREAKER_THRESHOLD, PROVIDER_BREAKER_COOLDOWN
+
+
+def _percentile(values, pct):
+    if not values: return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class ProviderHealth:
+    """
+    Rolling health of one stream addon plus a circuit breaker.
+    After PROVIDER_BREAKER_THRESHOLD failures in a row the addon is skipped
+    for PROVIDER_BREAKER_COOLDOWN seconds; the first call after that is a
+    trial run that either closes the breaker or opens it again.
+    """
+    def __init__(self, name, window=50):
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.failures = deque(maxlen=window)
+        self.stream_counts = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.skipped = 0
+
+    def allow(self):
+        if time.monotonic() >= self.open_until:
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, latency, ok, stream_count=0):
+        self.latencies.append(latency)
+        self.failures.append(0 if ok else 1)
+        if ok:
+            self.stream_counts.append(stream_count)
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= PROVIDER_BREAKER_THRESHOLD:
+                self.open_until = time.monotonic() + PROVIDER_BREAKER_COOLDOWN
+
+    @property
+    def is_open(self):
+        return time.monotonic() < self.open_until
+
+    def summary(self):
+        calls = len(self.failures)
+        return {
+            "name": self.name,
+            "calls": calls,
+            "p50": _percentile(self.latencies, 50),
+            "p95": _percentile(self.latencies, 95),
+            "error_rate": (sum(self.failures) / calls) if calls else 0.0,
+            "avg_streams": (sum(self.stream_counts) / len(self.stream_counts)) if self.stream_counts else 0,
+            "open_for": max(0.0, self.open_until - time.monotonic()),
+            "skipped": self.skipped,
+        }
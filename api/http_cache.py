@@ -0,0 +1,229 @@
+# api/http_cache.py
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+import httpx
+
+from api.db import open_db
+from config import HTTP_CACHE_TTLS, HTTP_CACHE_DEFAULT_TTL
+
+# Redirects are stored like any other response, so a remembered 307 is served
+# from disk and the client jumps straight to the (usually cached) target.
+CACHEABLE_STATUS = (200, 301, 302, 303, 307, 308)
+
+# Headers that describe the wire encoding, not the decoded body we store.
+_DROP_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def is_cacheable(status, headers, body):
+    if status in CACHEABLE_STATUS: return True
+    # GraphQL (AniList) answers 404 when some aliased fields matched nothing,
+    # with the ones that did match in `data`: that is a real answer too
+    if status != 404: return False
+    if "json" not in next((v for k, v in headers if k.lower() == "content-type"), ""): return False
+    try:
+        return bool(json.loads(body).get("data"))
+    except (ValueError, AttributeError):
+        return False
+
+
+def cache_key(method, url, body=b""):
+    h = hashlib.sha1(f"{method.upper()} {url}\n".encode())
+    if body:
+        h.update(body)
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed store of HTTP responses, shared across restarts.
+    Entries are evicted least-recently-used once the stored bodies
+    exceed `max_bytes`.
+    """
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self._db = open_db(path, self._setup)
+
+    def _setup(self, db):
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self.total_bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    def get(self, key):
+        """Returns the stored entry as a dict, or None."""
+        if not self._db: return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, body, etag, last_modified, expires_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if not row: return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return {
+            "status": row[0],
+            "headers": json.loads(row[1]),
+            "body": row[2],
+            "etag": row[3],
+            "last_modified": row[4],
+            "expires_at": row[5],
+        }
+
+    def put(self, key, url, status, headers, body, ttl):
+        if not self._db: return
+        headers = [(k, v) for k, v in headers if k.lower() not in _DROP_HEADERS]
+        etag = next((v for k, v in headers if k.lower() == "etag"), None)
+        last_modified = next((v for k, v in headers if k.lower() == "last-modified"), None)
+        now = time.time()
+        size = len(body)
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(headers), body, etag, last_modified, now + ttl, now, size)
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def refresh(self, key, ttl):
+        """Marks an entry fresh again (after a 304 Not Modified)."""
+        if not self._db: return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                (now + ttl, now, key)
+            )
+
+    def _evict(self):
+        # Trim to 90% so we don't evict on every single insert at the limit
+        target = int(self.max_bytes * 0.9)
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self.total_bytes <= target: break
+            doomed.append((key,))
+            self.total_bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self):
+        if not self._db: return
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self.total_bytes = 0
+
+    def close(self):
+        if self._db:
+            self._db.close()
+            self._db = None
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps a real transport with ResponseCache.
+    Fresh entries are served from disk, expired ones are revalidated with
+    If-None-Match / If-Modified-Since, and stale entries are served when
+    the network is down.
+    """
+    def __init__(self, transport, cache, ttls=HTTP_CACHE_TTLS, default_ttl=HTTP_CACHE_DEFAULT_TTL):
+        self._transport = transport
+        self.cache = cache
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def ttl_for(self, host, inherited=None):
+        if host in self.ttls: return self.ttls[host]
+        return self.default_ttl if inherited is None else inherited
+
+    async def handle_async_request(self, request):
+        # httpx hands the same extensions to the request it builds for a
+        # redirect, so the target host is cached like the one that sent us there
+        ttl = self.ttl_for(request.url.host, request.extensions.get("cache_ttl"))
+        if ttl <= 0 or not self.cache.enabled or request.method not in ("GET", "POST"):
+            return await self._transport.handle_async_request(request)
+        request.extensions["cache_ttl"] = ttl
+
+        body = await request.aread()
+        key = cache_key(request.method, str(request.url), body)
+        entry = await asyncio.to_thread(self.cache.get, key)
+
+        if entry and entry["expires_at"] > time.time():
+            self.hits += 1
+            return self._from_entry(entry, request)
+
+        # Expired: ask the server whether our copy is still good
+        if entry and entry["status"] == 200:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            if entry:
+                self.hits += 1
+                return self._from_entry(entry, request)
+            raise
+
+        if response.status_code == 304 and entry:
+            await response.aclose()
+            self.revalidated += 1
+            await asyncio.to_thread(self.cache.refresh, key, ttl)
+            return self._from_entry(entry, request)
+
+        self.misses += 1
+        content = await response.aread()
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROP_HEADERS]
+
+        if is_cacheable(response.status_code, headers, content):
+            await asyncio.to_thread(
+                self.cache.put, key, str(request.url), response.status_code, headers, content, ttl
+            )
+        elif entry and response.status_code >= 500:
+            # Server is having a bad day, the old copy beats an error page
+            return self._from_entry(entry, request)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+        )
+
+    def _from_entry(self, entry, request):
+        return httpx.Response(
+            status_code=entry["status"],
+            headers=entry["headers"],
+            content=entry["body"],
+            request=request,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+        await asyncio.to_thread(self.cache.close)
@@ -0,0 +1,225 @@
+# api/scheduler.py
+import asyncio
+import contextvars
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from config import HOST_RATE_LIMITS, RATE_LIMIT_MAX_RETRIES, RATE_LIMIT_MAX_RETRY_AFTER
+
+# Priority lanes. Lower runs first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Tokens kept back for the interactive lane, so a burst of prefetch
+# can never drain a host's whole budget.
+INTERACTIVE_RESERVE = 2
+
+# How often (s) a host queue that is waiting for tokens looks at its
+# waiters' lanes again, in case one was moved up.
+LANE_RECHECK = 0.1
+
+# Requests inherit the lane of the task that issued them.
+request_priority = contextvars.ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+# Lanes of the shared flights (api.base.SingleFlight) this task runs inside,
+# innermost last. Each is a one-item list, so a more urgent caller joining a
+# flight later can move the work already under way to its lane.
+flight_lanes = contextvars.ContextVar("flight_lanes", default=())
+
+
+@contextmanager
+def priority(lane):
+    """with priority(PRIORITY_BACKGROUND): ... marks every request made inside."""
+    # An explicit lane wins over whatever flights we were started from
+    token = request_priority.set(lane)
+    flights = flight_lanes.set(())
+    try:
+        yield
+    finally:
+        flight_lanes.reset(flights)
+        request_priority.reset(token)
+
+
+def current_lane():
+    """The lane a request made right now goes out in."""
+    return min([request_priority.get()] + [box[0] for box in flight_lanes.get()])
+
+
+def lane_getter():
+    """current_lane() of this task as a function that can be called from any task later."""
+    lane, boxes = request_priority.get(), flight_lanes.get()
+    return lambda: min([lane] + [box[0] for box in boxes])
+
+
+def flight_context():
+    """
+    A copy of the current context for a shared flight's task, with a lane
+    of its own that joiners can raise. Returns (context, lane box).
+    """
+    box = [current_lane()]
+    ctx = contextvars.copy_context()
+    ctx.run(flight_lanes.set, flight_lanes.get() + (box,))
+    return ctx, box
+
+
+def join_lane(box):
+    """Moves a shared flight up to the caller's lane if that one is more urgent."""
+    box[0] = min(box[0], current_lane())
+
+
+def parse_retry_after(value):
+    """Retry-After is either seconds or an HTTP date. Returns seconds or None."""
+    if not value: return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    """
+    Token bucket for one host with a priority queue of waiters.
+    `requests` tokens refill every `per` seconds; a 429 pauses the
+    whole host until its Retry-After has passed.
+    """
+    def __init__(self, requests, per):
+        self.capacity = float(requests)
+        self.rate = requests / per
+        self.tokens = self.capacity
+        self.reserve = min(INTERACTIVE_RESERVE, requests - 1)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiters = []  # (lane getter, seq, future)
+        self._seq = itertools.count()
+        self._pump_task = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _needed(self, lane):
+        return 1 + (self.reserve if lane != PRIORITY_INTERACTIVE else 0)
+
+    def _try_take(self, lane):
+        if time.monotonic() < self.blocked_until: return False
+        self._refill()
+        if self.tokens >= self._needed(lane):
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, lane, timeout=None):
+        """
+        Waits for a token. `lane` is a function returning the request's lane;
+        it is asked again while queued, since a shared flight can be moved up.
+        Raises asyncio.TimeoutError if no token comes within `timeout` seconds.
+        """
+        if not self._waiters and self._try_take(lane()):
+            return
+        # Paused past the deadline by a 429: no point queueing
+        if timeout is not None and self.blocked_until - time.monotonic() > timeout:
+            raise asyncio.TimeoutError
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((lane, next(self._seq), fut))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        # A cancelled waiter (also one that timed out) is dropped by the pump
+        await asyncio.wait_for(fut, timeout)
+
+    async def _pump(self):
+        while self._waiters:
+            # Cancelled waiters drop out; lanes can change while queued, so
+            # the most urgent one is picked afresh every time (the queue is short)
+            self._waiters = [w for w in self._waiters if not w[2].done()]
+            if not self._waiters: break
+            lane, seq, fut = min((w[0](), w[1], w[2]) for w in self._waiters)
+
+            wait = self.blocked_until - time.monotonic()
+            if wait <= 0 and self._try_take(lane):
+                self._waiters = [w for w in self._waiters if w[2] is not fut]
+                fut.set_result(None)
+                continue
+            if wait <= 0:
+                wait = (self._needed(lane) - self.tokens) / self.rate
+            # Wake up now and then so a promoted waiter isn't stuck behind the wait
+            await asyncio.sleep(min(max(wait, 0.005), LANE_RECHECK))
+
+    def block_for(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    @property
+    def queued(self):
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+
+class SchedulingTransport(httpx.AsyncBaseTransport):
+    """
+    Rate-limits requests per host (HOST_RATE_LIMITS), lets interactive
+    requests overtake background ones, and retries 429/503 answers after
+    Retry-After (at most max_retry_after seconds) or an exponential backoff.
+    Queueing and retries stay within the request's pool timeout: past it the
+    request fails with httpx.PoolTimeout, or the last 429/503 is returned.
+    Hosts without a limit go straight through.
+    """
+    def __init__(self, transport, limits=HOST_RATE_LIMITS, max_retries=RATE_LIMIT_MAX_RETRIES,
+                 max_retry_after=RATE_LIMIT_MAX_RETRY_AFTER):
+        self._transport = transport
+        self.limiters = {host: HostLimiter(*limit) for host, limit in limits.items()}
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.throttled = 0
+        self.timed_out = 0
+
+    async def handle_async_request(self, request):
+        limiter = self.limiters.get(request.url.host)
+        if limiter is None:
+            return await self._transport.handle_async_request(request)
+
+        # Asked again while queued: a joiner may have raised the lane
+        lane = lane_getter()
+        # The client's timeout (15 s) covers the time spent waiting here too
+        timeout = request.extensions.get("timeout", {}).get("pool")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while True:
+            try:
+                await limiter.acquire(lane, None if deadline is None else max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise httpx.PoolTimeout(f"rate limit queue for {request.url.host} took too long", request=request)
+            response = await self._transport.handle_async_request(request)
+            if response.status_code not in (429, 503) or attempt >= self.max_retries:
+                return response
+
+            self.throttled += 1
+            delay = parse_retry_after(response.headers.get("retry-after"))
+            if delay is None:
+                delay = (2 ** attempt) + random.random()
+            delay = min(delay, self.max_retry_after)
+            # Can't retry in time: let the caller have the 429 now
+            if deadline is not None and time.monotonic() + delay > deadline:
+                return response
+            await response.aclose()
+            limiter.block_for(delay)
+            attempt += 1
+
+    def stats(self):
+        return {
+            "throttled": self.throttled,
+            "timed_out": self.timed_out,
+            "queued": {host: l.queued for host, l in self.limiters.items() if l.queued},
+        }
+
+    async def aclose(self):
+        await self._transport.aclose()
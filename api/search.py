@@ -1,7 +1,47 @@
 # api/search.py
+from collections import OrderedDict
+from config import SEARCH_CACHE_SIZE
+
+def _normalize_query(query):
+    return " ".join(query.lower().split())
+
+def title_matches(title, query):
+    """Every word typed so far starts a title word, in the order typed."""
+    words = iter(str(title or "").lower().split())
+    return all(any(w.startswith(q) for w in words) for q in _normalize_query(query).split())
 
 class SearchMixin:
+    def _search_lru(self):
+        if not hasattr(self, '_search_results'):
+            self._search_results = OrderedDict()
+        return self._search_results
+
+    def search_cached(self, query: str):
+        """
+        Best answer without touching the network: the exact query if we have
+        it, otherwise the results of the longest cached prefix, narrowed down
+        to titles that still match. None if nothing covers the query.
+        """
+        key = _normalize_query(query)
+        lru = self._search_lru()
+        if key in lru:
+            lru.move_to_end(key)
+            return list(lru[key])
+
+        for end in range(len(key) - 1, 0, -1):
+            prefix = key[:end]
+            if prefix in lru:
+                matches = [r for r in lru[prefix] if title_matches(r.get('title'), key)]
+                return matches or None
+        return None
+
     async def search_imdb(self, query: str):
+        key = _normalize_query(query)
+        lru = self._search_lru()
+        if key in lru:
+            lru.move_to_end(key)
+            return list(lru[key])
+
         # We use a public suggestion API from IMDB (unofficial but stable)
         url = f"https://v3.sg.media-imdb.com/suggestion/x/{query}.json"
         try:
@@ -18,6 +58,10 @@ class SearchMixin:
                         "id": item.get('id'),
                         "poster": item.get('i', {}).get('imageUrl')
                     })
-            return results
         except Exception:
             return []
+
+        lru[key] = results
+        while len(lru) > SEARCH_CACHE_SIZE:
+            lru.popitem(last=False)
+        return list(results)
@@ -1,14 +1,37 @@
 # api/streams.py
 import urllib.parse
 import asyncio
-from config import PROVIDERS
+import time
+from config import PROVIDERS, PROVIDER_DEFAULT_TIMEOUT
+from api.health import ProviderHealth
 
 class StreamsMixin:
+    def provider_health(self, name):
+        if not hasattr(self, '_provider_health'):
+            self._provider_health = {}
+        if name not in self._provider_health:
+            self._provider_health[name] = ProviderHealth(name)
+        return self._provider_health[name]
+
+    def provider_health_summary(self):
+        return [self.provider_health(p['name']).summary() for p in PROVIDERS]
+
     async def fetch_provider_stream(self, provider, type_, id_):
         streams = []
         status_code = None
         error_message = None
         
+        health = self.provider_health(provider['name'])
+        if not health.allow():
+            return {
+                "name": provider['name'],
+                "streams": [],
+                "status": None,
+                "error": "Skipped (circuit open)",
+                "skipped": True,
+            }
+
+        started = time.monotonic()
         try:
             parsed_url = urllib.parse.urlparse(provider['url'])
             base_url_path = parsed_url.path.replace("/manifest.json", "")
@@ -16,7 +39,9 @@ class StreamsMixin:
             
             url = f"{base_url}/stream/{type_}/{id_}.json"
             
-            resp = await self.client.get(url)
+            # Whole-request deadline, so one slow addon can't hold up the rest
+            timeout = provider.get('timeout', PROVIDER_DEFAULT_TIMEOUT)
+            resp = await asyncio.wait_for(self.client.get(url), timeout)
             status_code = resp.status_code
             
             if resp.status_code == 200:
@@ -25,23 +50,36 @@ class StreamsMixin:
             else:
                 error_message = f"HTTP Error {status_code}"
                 
+        except asyncio.TimeoutError:
+            error_message = "Timed out"
         except Exception as e:
             error_message = f"Network Error: {type(e).__name__}"
         
+        latency = time.monotonic() - started
+        health.record(latency, error_message is None, len(streams))
+
         return {
             "name": provider['name'],
             "streams": streams,
             "status": status_code,
             "error": error_message,
+            "latency": latency,
         }
 
-    async def get_all_streams(self, type_: str, id_: str):
-        tasks = [self.fetch_provider_stream(p, type_, id_) for p in PROVIDERS]
-        results_list = await asyncio.gather(*tasks)
-        
-        all_streams = []
-        for result in results_list:
-            if result and result.get('streams'):
-                all_streams.extend(result['streams'])
-
-        return all_streams
+    async def iter_streams(self, type_: str, id_: str, providers=None):
+        """
+        Yields each provider's result (same dict as fetch_provider_stream)
+        as soon as it arrives, fastest provider first.
+        providers: names to ask (default: all of PROVIDERS)
+        """
+        tasks = [
+            asyncio.create_task(self.fetch_provider_stream(p, type_, id_))
+            for p in PROVIDERS if providers is None or p['name'] in providers
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer stopped early (screen closed) -> don't leave requests running
+            for task in tasks:
+                task.cancel()
@@ -7,36 +7,75 @@ class TVMazeMixin:
     Expects 'self.client' to be an httpx.AsyncClient.
     """
     
-    async def get_series_details_tvmaze(self, imdb_id: str):
+    async def resolve_tvmaze_id(self, imdb_id: str):
+        """
+        Maps an IMDb id to a TVMaze show id.
+        TVMaze answers the lookup with a redirect to /shows/<id>, so we read the
+        id off the Location header instead of following it. The mapping is kept
+        in memory here and on disk by the response cache.
+        """
+        if not hasattr(self, '_tvmaze_ids'):
+            self._tvmaze_ids = {}
+        if imdb_id in self._tvmaze_ids:
+            return self._tvmaze_ids[imdb_id]
+
+        show_id = None
         try:
             lookup_url = f"{TVMAZE_URL}/lookup/shows?imdb={imdb_id}"
-            resp = await self.client.get(lookup_url, follow_redirects=True)
-            if resp.status_code != 200: return None
-            
-            show_data = resp.json()
+            resp = await self.client.get(lookup_url, follow_redirects=False)
+            if resp.is_redirect:
+                tail = resp.headers.get('location', '').rstrip('/').rsplit('/', 1)[-1]
+                if tail.isdigit():
+                    show_id = int(tail)
+            elif resp.status_code == 200:
+                show_id = resp.json().get('id')
+        except:
+            return None
+
+        # Only remember real answers; network errors should be retried next time
+        if show_id or resp.status_code == 404:
+            self._tvmaze_ids[imdb_id] = show_id
+        return show_id
+
+    async def get_tvmaze_bundle(self, show_id):
+        """Show, episodes and seasons in a single request using TVMaze's embed support."""
+        try:
+            url = f"{TVMAZE_URL}/shows/{show_id}?embed[]=episodes&embed[]=seasons"
+            resp = await self.client.get(url)
+            if resp.status_code == 200:
+                return resp.json()
+        except:
+            pass
+        return None
+
+    async def get_series_details_tvmaze(self, imdb_id: str):
+        try:
+            show_id = await self.resolve_tvmaze_id(imdb_id)
+            if not show_id: return None
+
+            show_data = await self.get_tvmaze_bundle(show_id)
+            if not show_data: return None
             return await self._normalize_tvmaze(show_data)
         except:
             return None
 
     async def get_all_seasons_details_tvmaze(self, imdb_id):
         try:
-            lookup_url = f"{TVMAZE_URL}/lookup/shows?imdb={imdb_id}"
-            resp = await self.client.get(lookup_url, follow_redirects=True)
-            if resp.status_code != 200: return {}
-            
-            show_id = resp.json().get('id')
-            seasons_url = f"{TVMAZE_URL}/shows/{show_id}/seasons"
-            resp = await self.client.get(seasons_url)
-            if resp.status_code != 200: return {}
+            show_id = await self.resolve_tvmaze_id(imdb_id)
+            if not show_id: return {}
+
+            # Same URL as get_series_details_tvmaze, so this is a cache hit
+            show_data = await self.get_tvmaze_bundle(show_id)
+            if not show_data: return {}
             
             results = {}
-            for s in resp.json():
+            for s in show_data.get('_embedded', {}).get('seasons', []):
                 s_num = s.get('number')
                 if s_num:
                     try:
                         results[int(s_num)] = {
-                            "poster": s.get('image', {}).get('original'),
-                            "overview": s.get('summary', '').replace('<p>', '').replace('</p>', '').replace('<b>', '').replace('</b>', ''),
+                            "poster": (s.get('image') or {}).get('original'),
+                            "overview": (s.get('summary') or '').replace('<p>', '').replace('</p>', '').replace('<b>', '').replace('</b>', ''),
                             "rating": None 
                         }
                     except: pass
@@ -53,7 +92,8 @@ class TVMazeMixin:
             
             results = resp.json()
             if not results: return None
-            return await self._normalize_tvmaze(results[0]['show'])
+            show_data = await self.get_tvmaze_bundle(results[0]['show']['id'])
+            return await self._normalize_tvmaze(show_data or results[0]['show'])
         except:
             return None
 
@@ -68,7 +108,11 @@ class TVMazeMixin:
         return []
 
     async def _normalize_tvmaze(self, show_data):
-        episodes = await self._fetch_tvmaze_episodes(show_data.get('id'))
+        embedded = show_data.get('_embedded', {})
+        if 'episodes' in embedded:
+            episodes = embedded['episodes']
+        else:
+            episodes = await self._fetch_tvmaze_episodes(show_data.get('id'))
         
         country = "Unknown"
         try:
@@ -82,11 +126,11 @@ class TVMazeMixin:
             "source": "TVMaze",
             "name": show_data.get('name'),
             "description": show_data.get('summary', '').replace('<p>', '').replace('</p>', '').replace('<b>', '').replace('</b>', ''),
-            "poster": show_data.get('image', {}).get('original'),
+            "poster": (show_data.get('image') or {}).get('original'),
             "year": show_data.get('premiered', '')[:4] if show_data.get('premiered') else 'N/A',
             "status": show_data.get('status'),
             "runtime": show_data.get('averageRuntime'),
-            "rating": show_data.get('rating', {}).get('average'),
+            "rating": (show_data.get('rating') or {}).get('average'),
             "genres": show_data.get('genres', []),
             "country": country,
             "videos": []
@@ -98,8 +142,8 @@ class TVMazeMixin:
                 "name": ep.get('name'),
                 "overview": ep.get('summary', '').replace('<p>', '').replace('</p>', '').replace('<b>', '').replace('</b>', '') if ep.get('summary') else None,
                 "released": ep.get('airdate'),
-                "rating": ep.get('rating', {}).get('average'),
-                "thumbnail": ep.get('image', {}).get('original'),
+                "rating": (ep.get('rating') or {}).get('average'),
+                "thumbnail": (ep.get('image') or {}).get('original'),
                 "id": ep.get('id')
             })
         return meta
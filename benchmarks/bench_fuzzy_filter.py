@@ -0,0 +1,108 @@
+"""
+In-list `/` filter: time per keystroke over 5,000 rows, for
+core.fuzzy.FuzzyIndex against a plain per-row subsequence scan.
+
+Rows mix what the lists show: episode labels of a long anime, release
+filenames from stream addons and titles from the history. Each query is
+typed one key at a time, like the ListFilter prompt sees it. A frame at
+60 fps is 16.7 ms.
+
+    python -m benchmarks.bench_fuzzy_filter
+"""
+import random
+import time
+
+from core.fuzzy import FuzzyIndex, score_match
+
+ROWS = 5000
+ROUNDS = 10
+FRAME_MS = 1000 / 60
+
+QUERIES = ["one piece", "1080p web", "s01e07", "ozy", "fl remux", "the bear"]
+
+WORDS = ["The", "Return", "of", "Pirate", "King", "Storm", "Island", "Dawn", "Night",
+         "Bear", "Piece", "One", "Red", "Hair", "Final", "Battle", "Ozymandias", "Flight"]
+GROUPS = ["NTb", "FLUX", "RARBG", "GalaxyTV", "EDITH", "successfulcrab", "MeGusta"]
+SOURCES = ["WEB-DL", "WEBRip", "BluRay", "HDTV", "REMUX"]
+RESOLUTIONS = ["2160p", "1080p", "720p", "480p"]
+
+
+def make_rows(rnd):
+    rows = []
+    for i in range(ROWS):
+        kind = i % 3
+        name = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 5)))
+        if kind == 0:
+            rows.append(f"{i // 3 + 1:04d} {name}")
+        elif kind == 1:
+            show = rnd.choice(["One.Piece", "The.Bear", "Breaking.Bad", "Shogun"])
+            rows.append(
+                f"[Tor] [{rnd.choice(RESOLUTIONS)}] {show}.S{rnd.randint(1, 9):02d}E{rnd.randint(1, 24):02d}."
+                f"{name.replace(' ', '.')}.{rnd.choice(SOURCES)}.x264-{rnd.choice(GROUPS)}"
+            )
+        else:
+            rows.append(f"{name} {rnd.randint(1970, 2025)}")
+    return rows
+
+
+def naive_search(texts, query):
+    """What a list would do without an index: scan and score every row, every key."""
+    query = query.lower()
+    scored = []
+    for i, text in enumerate(texts):
+        lower = text.lower()
+        end = 0
+        for c in query:
+            end = lower.find(c, end) + 1
+            if not end: break
+        else:
+            scored.append((-score_match(lower, query, end), len(text), i))
+    scored.sort()
+    return [i for _, _, i in scored]
+
+
+def type_query(search, query):
+    """Per-keystroke times (ms) for typing `query` one key at a time."""
+    times = []
+    for n in range(1, len(query) + 1):
+        start = time.perf_counter()
+        search(query[:n])
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def best_keystrokes(make_search, query):
+    """Best of ROUNDS runs per keystroke (the box is noisy)."""
+    best = None
+    for _ in range(ROUNDS):
+        times = type_query(make_search(), query)
+        best = times if best is None else [min(a, b) for a, b in zip(best, times)]
+    return best
+
+
+def main():
+    rows = make_rows(random.Random(7))
+
+    start = time.perf_counter()
+    FuzzyIndex(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{ROWS} rows, index built in {build_ms:.1f} ms (once per list, on the first '/')")
+    print(f"one frame = {FRAME_MS:.1f} ms\n")
+
+    print(f"{'query':>10} {'matches':>8} {'naive worst':>12} {'index worst':>12} {'index mean':>11}")
+    worst = 0.0
+    for query in QUERIES:
+        old = best_keystrokes(lambda: (lambda q: naive_search(rows, q)), query)
+        # A fresh index per run, so every run types the query from its first key
+        new = best_keystrokes(lambda: FuzzyIndex(rows).search, query)
+        matches = len(FuzzyIndex(rows).search(query))
+        assert FuzzyIndex(rows).search(query) == naive_search(rows, query)
+        worst = max(worst, max(new))
+        print(f"{query:>10} {matches:8d} {max(old):10.2f}ms {max(new):10.2f}ms {sum(new) / len(new):9.2f}ms")
+
+    verdict = "under" if worst < FRAME_MS else "OVER"
+    print(f"\nslowest keystroke {worst:.2f} ms: {verdict} one frame")
+
+
+if __name__ == "__main__":
+    main()
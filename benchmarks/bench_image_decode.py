@@ -0,0 +1,79 @@
+"""
+Keystroke-to-frame latency while posters are being decoded.
+
+Simulates holding `j` in an episode list (one key every KEY_INTERVAL
+seconds) while a season's worth of thumbnails finish downloading at
+once, and measures how late each key gets handled by the event loop.
+Runs once decoding inline and once with the ImageCache worker pool.
+
+    python -m benchmarks.bench_image_decode
+"""
+import asyncio
+import random
+import statistics
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from core.cache import ImageCache
+
+POSTERS = 25
+POSTER_SIZE = (1000, 1500)  # roughly a TVMaze 'original' poster
+KEY_INTERVAL = 0.03
+KEYS = 60
+
+
+def make_jpeg(seed):
+    rnd = random.Random(seed)
+    img = Image.new("RGB", POSTER_SIZE)
+    # Blocky noise so the JPEG is not trivially compressible
+    for _ in range(400):
+        x, y = rnd.randrange(POSTER_SIZE[0]), rnd.randrange(POSTER_SIZE[1])
+        color = tuple(rnd.randrange(256) for _ in range(3))
+        img.paste(color, (x, y, min(x + 80, POSTER_SIZE[0]), min(y + 80, POSTER_SIZE[1])))
+    buf = BytesIO()
+    img.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+async def hold_j(latencies):
+    start = time.perf_counter()
+    for i in range(KEYS):
+        due = start + i * KEY_INTERVAL
+        await asyncio.sleep(max(0, due - time.perf_counter()))
+        latencies.append((time.perf_counter() - due) * 1000)
+
+
+async def run(payloads, workers):
+    cache = ImageCache(decode_workers=workers)
+    latencies = []
+    keys = asyncio.create_task(hold_j(latencies))
+    await asyncio.sleep(KEY_INTERVAL * 5)
+    started = time.perf_counter()
+    await asyncio.gather(*(cache.decode(p) for p in payloads))
+    decode_ms = (time.perf_counter() - started) * 1000
+    await keys
+    await cache.close()
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+        "decode_ms": decode_ms,
+    }
+
+
+def main():
+    payloads = [make_jpeg(i) for i in range(POSTERS)]
+    print(f"{POSTERS} posters {POSTER_SIZE[0]}x{POSTER_SIZE[1]}, key every {KEY_INTERVAL * 1000:.0f} ms")
+    for label, workers in (("inline", 0), ("pool(2)", 2), ("pool(4)", 4)):
+        r = asyncio.run(run(payloads, workers))
+        print(
+            f"{label:>8}: key latency p50 {r['p50']:6.1f} ms  p95 {r['p95']:6.1f} ms  "
+            f"max {r['max']:6.1f} ms | all decoded in {r['decode_ms']:6.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Stream parsing throughput: the old inline parser from StreamSelectScreen
+against core.streams.parse_streams.
+
+Payloads are generated in the shape Torrentio and Comet return
+(name / title / infoHash / fileIdx / behaviorHints), a few hundred
+streams each, like a popular episode.
+
+    python -m benchmarks.bench_stream_parse
+"""
+import random
+import re
+import time
+
+from core.streams import parse_streams
+from core.utils import format_size
+
+STREAMS_PER_PROVIDER = 400
+ROUNDS = 20
+
+GROUPS = ["NTb", "FLUX", "RARBG", "GalaxyTV", "EDITH", "successfulcrab", "MeGusta"]
+SOURCES = ["WEB-DL", "WEBRip", "BluRay", "HDTV", "REMUX"]
+RESOLUTIONS = ["2160p", "1080p", "720p", "480p"]
+TRACKERS = ["ThePirateBay", "1337x", "TorrentGalaxy", "EZTV", "Rutor"]
+
+
+def torrentio_payload(rnd):
+    streams = []
+    for i in range(STREAMS_PER_PROVIDER):
+        res = rnd.choice(RESOLUTIONS)
+        name = f"Breaking.Bad.S01E01.Pilot.{res}.{rnd.choice(SOURCES)}.x264-{rnd.choice(GROUPS)}"
+        size = f"{rnd.uniform(0.2, 12):.2f} GB"
+        streams.append({
+            "name": f"Torrentio\n{res}",
+            "title": f"{name}\n👤 {rnd.randint(0, 3000)} 💾 {size} ⚙️ {rnd.choice(TRACKERS)}",
+            "infoHash": "".join(rnd.choice("0123456789abcdef") for _ in range(40)),
+            "fileIdx": rnd.randint(0, 8),
+            "behaviorHints": {"bingeGroup": f"torrentio|{res}", "filename": f"{name}.mkv"},
+        })
+    return streams
+
+
+def comet_payload(rnd):
+    streams = []
+    for i in range(STREAMS_PER_PROVIDER):
+        res = rnd.choice(RESOLUTIONS)
+        name = f"Breaking Bad S01E01 {res} {rnd.choice(SOURCES)} {rnd.choice(GROUPS)}"
+        streams.append({
+            "name": f"[TORRENT🧲] Comet {res}",
+            "description": f"{name}\n💾 {rnd.uniform(0.2, 12):.1f} GB 👥 {rnd.randint(0, 900)} 🔎 {rnd.choice(TRACKERS)}",
+            "infoHash": "".join(rnd.choice("0123456789abcdef") for _ in range(40)),
+            "fileIdx": rnd.randint(0, 8),
+            "behaviorHints": {"filename": f"{name}.mkv", "videoSize": rnd.randint(2 * 10**8, 12 * 10**9)},
+        })
+    return streams
+
+
+def legacy_parse(streams):
+    """The per-stream logic StreamSelectScreen.fetch_streams used to run inline."""
+    rows = []
+    for s in streams:
+        if not isinstance(s, dict): continue
+        raw_provider = s.get('provider') or s.get('name', 'UNK')
+        raw_provider = raw_provider.replace('\n', ' ')
+        if "Torrentio" in raw_provider: provider_tag = "Tor"
+        elif "Comet" in raw_provider: provider_tag = "Comet"
+        else: provider_tag = raw_provider[:5]
+
+        full_title = s.get('title', '')
+        bh = s.get('behaviorHints', {})
+        size_str = ""
+        seed_str = ""
+        if bh.get('videoSize'):
+            size_str = format_size(bh.get('videoSize'))
+        if s.get('seeds') is not None:
+            seed_str = str(s['seeds'])
+        if not size_str:
+            size_match = re.search(r'(?:💾|📦|Size)\s?([\d\.]+\s?[KMGT]B)', full_title, re.IGNORECASE)
+            if size_match:
+                size_str = size_match.group(1)
+            else:
+                loose_match = re.search(r'(\d+(?:\.\d+)?\s?[KMGT]B)', full_title)
+                if loose_match: size_str = loose_match.group(1)
+        if not seed_str:
+            seed_match = re.search(r'(?:👤|👥|S:)\s?(\d+)', full_title)
+            if seed_match: seed_str = seed_match.group(1)
+
+        filename = full_title.split('\n')[0] if '\n' in full_title else full_title
+        if not filename: filename = bh.get('filename')
+        if not filename: filename = "Unknown Release"
+
+        check_str = (full_title + " " + raw_provider).lower()
+        res_tag = ""
+        if "2160p" in check_str or "4k" in check_str: res_tag = "4K"
+        elif "1080p" in check_str: res_tag = "1080p"
+        elif "720p" in check_str: res_tag = "720p"
+        elif "480p" in check_str: res_tag = "480p"
+        elif "cam" in check_str: res_tag = "CAM"
+
+        link = s.get('url') or s.get('infoHash')
+        if not link: continue
+        if not link.startswith("magnet") and not link.startswith("http"):
+            link = f"magnet:?xt=urn:btih:{link}"
+        rows.append((provider_tag, res_tag, filename, size_str, seed_str, link))
+    return rows
+
+
+def best_us(fn, streams):
+    """Best of ROUNDS runs, in microseconds per stream (the box is noisy)."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(streams)
+        best = min(best, time.perf_counter() - start)
+    return best / len(streams) * 1e6
+
+
+def main():
+    rnd = random.Random(7)
+    torrentio, comet = torrentio_payload(rnd), comet_payload(rnd)
+    # The old parser only read 'title'; give it Comet's text there too so
+    # both sides do the same work.
+    comet_as_title = [dict(s, title=s["description"]) for s in comet]
+
+    print(f"{STREAMS_PER_PROVIDER} streams per provider, best of {ROUNDS} runs (us/stream)")
+    print(f"{'':>10} {'legacy':>8} {'StreamInfo':>11}")
+    for label, legacy_streams, streams, name in (
+        ("Torrentio", torrentio, torrentio, "Torrentio"),
+        ("Comet", comet_as_title, comet, "Comet"),
+    ):
+        old = best_us(legacy_parse, legacy_streams)
+        new = best_us(lambda x: parse_streams(x, name), streams)
+        print(f"{label:>10} {old:8.2f} {new:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
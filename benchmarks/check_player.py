@@ -0,0 +1,85 @@
+"""
+core.player end to end against benchmarks/fake_mpv.py instead of
+webtorrent + mpv: the session follows position and buffering over IPC,
+commands get their replies, stop() ends the player, the exit code comes
+through and the torrent folder is released in the TorrentCache.
+Also checks the event loop keeps running while the player plays.
+
+    python -m benchmarks.check_player
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from core.player import Player
+from core.torrent_cache import TorrentCache
+
+FAKE_MPV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_mpv.py")
+LINK = "magnet:?xt=urn:btih:0123456789abcdef0123456789abcdef01234567"
+
+
+def fake_command(ticks=6, exit_code=0):
+    def command(link, out_dir, file_idx, ipc_path, windowed=False):
+        return [sys.executable, FAKE_MPV, f"--input-ipc-server={ipc_path}", f"--ticks={ticks}", f"--exit={exit_code}"]
+    return command
+
+
+async def check_playback(torrents, ipc_dir):
+    player = Player(torrents, command=fake_command(ticks=6, exit_code=3), ipc_dir=ipc_dir)
+    start = time.perf_counter()
+    session = await player.play(LINK, 2, "Show S01E02")
+    print(f"play() returned in {(time.perf_counter() - start) * 1000:.0f} ms")
+    assert session.running
+    assert torrents._in_use.get(session.out_dir) == 1, "torrent folder not pinned while playing"
+
+    updates = []
+    session.watch(lambda s: updates.append((s.position, s.buffering)))
+    loop_ticks = 0
+    while session.running:
+        loop_ticks += 1
+        await asyncio.sleep(0.01)
+
+    assert await session.wait() == 3, session.exit_code
+    assert session.position == 60.0 and session.duration == 1500.0, (session.position, session.duration)
+    assert any(buffering for _, buffering in updates), "paused-for-cache never seen"
+    assert not session.buffering
+    assert not torrents._in_use, "torrent folder still pinned after exit"
+    assert not os.path.exists(session.ipc_path)
+    print(f"playback: {len(updates)} updates, exit {session.exit_code}, loop ticked {loop_ticks}x while playing")
+    return player
+
+
+async def check_commands(player, torrents):
+    # Long enough that only stop() ends it
+    player.command = fake_command(ticks=10_000)
+    session = await player.play(LINK, None, "resume")
+    assert session.file_idx == 2, "resume lost the file index"
+    while not session.connected:
+        assert session.running, "fake mpv exited before the IPC socket came up"
+        await asyncio.sleep(0.05)
+
+    assert await session.command("get_property", "duration") == 1500.0
+    assert await session.command("set_property", "pause", True) is None
+    assert await session.command("get_property", "pause") is True
+    assert await session.command("no_such_command") is None
+
+    start = time.perf_counter()
+    code = await session.stop()
+    print(f"commands: ok, stop() took {(time.perf_counter() - start) * 1000:.0f} ms, exit {code}")
+    assert code == 0 and not session.running
+    assert not torrents._in_use, "torrent folder still pinned after stop()"
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as root:
+        torrents = TorrentCache(root=os.path.join(root, "torrents"))
+        player = await check_playback(torrents, os.path.join(root, "ipc"))
+        await check_commands(player, torrents)
+        await player.close()
+    print("ok")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Stand-in for webtorrent + mpv, for running core.player without either.
+
+Waits a moment (webtorrent fetching metadata), then serves mpv's JSON IPC
+on --input-ipc-server: observe_property, get_property, set_property and
+quit. Playback is `--ticks=N` steps of 10 s of time-pos, with the second
+step stalled on the cache (paused-for-cache), after which it exits
+(status `--exit=N`, 0 by default).
+
+    python -m benchmarks.fake_mpv --input-ipc-server=/tmp/mpv.sock --ticks=6
+"""
+import asyncio
+import json
+import sys
+
+STARTUP_DELAY = 0.3
+TICK = 0.05
+
+
+def arg(name, default=None):
+    prefix = f"--{name}="
+    return next((a[len(prefix):] for a in sys.argv[1:] if a.startswith(prefix)), default)
+
+
+class FakeMpv:
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.state = {
+            "time-pos": 0.0, "duration": 1500.0, "pause": False,
+            "paused-for-cache": False, "cache-buffering-state": 100,
+        }
+        self.observers = {}  # property -> observe id
+        self.clients = []
+        self.done = asyncio.Event()
+        self._playing = None
+
+    async def handle(self, reader, writer):
+        self.clients.append((asyncio.current_task(), writer))
+
+        def send(msg):
+            writer.write(json.dumps(msg).encode() + b"\n")
+
+        while not self.done.is_set():
+            line = await reader.readline()
+            if not line: break
+            msg = json.loads(line)
+            cmd, request_id = msg["command"], msg.get("request_id", 0)
+
+            if cmd[0] == "observe_property":
+                self.observers[cmd[2]] = cmd[1]
+                send({"event": "property-change", "id": cmd[1], "name": cmd[2], "data": self.state.get(cmd[2])})
+                if self._playing is None:
+                    self._playing = asyncio.create_task(self.play(send, writer))
+            elif cmd[0] == "get_property":
+                send({"request_id": request_id, "error": "success", "data": self.state.get(cmd[1])})
+            elif cmd[0] == "set_property":
+                self.state[cmd[1]] = cmd[2]
+                send({"request_id": request_id, "error": "success", "data": None})
+            elif cmd[0] == "quit":
+                send({"request_id": request_id, "error": "success", "data": None})
+                self.done.set()
+            else:
+                send({"request_id": request_id, "error": "invalid parameter"})
+            await writer.drain()
+
+    async def play(self, send, writer):
+        for i in range(self.ticks):
+            await asyncio.sleep(TICK)
+            self.state["time-pos"] += 10
+            self.state["paused-for-cache"] = i == 1
+            for name, observe_id in self.observers.items():
+                send({"event": "property-change", "id": observe_id, "name": name, "data": self.state[name]})
+            await writer.drain()
+        self.done.set()
+
+
+async def main():
+    ipc_path = arg("input-ipc-server")
+    mpv = FakeMpv(int(arg("ticks", "6")))
+    await asyncio.sleep(STARTUP_DELAY)
+    server = await asyncio.start_unix_server(mpv.handle, ipc_path)
+    await mpv.done.wait()
+    server.close()
+    # Like mpv quitting: hang up on every client and let the handlers see EOF
+    for task, writer in mpv.clients:
+        writer.close()
+    await asyncio.gather(*(task for task, _ in mpv.clients), return_exceptions=True)
+    return int(arg("exit", "0"))
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
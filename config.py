@@ -19,13 +19,134 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+# --- HISTORY ---
+# Watch history is user data, so it lives outside the cache dir.
+DATA_DIR = os.path.expanduser(os.getenv("STREMIO_TUI_DATA_DIR", "~/.local/share/stremio-tui"))
+HISTORY_DB_FILE = os.path.join(DATA_DIR, "history.sqlite3")
+# The old JSON history (relative to the working directory), imported once.
+LEGACY_HISTORY_FILE = "history.json"
+# Shows listed in the history view, most recent first.
+HISTORY_VIEW_LIMIT = 200
+
+# --- CACHE ---
+CACHE_DIR = os.path.expanduser(os.getenv("STREMIO_TUI_CACHE_DIR", "~/.cache/stremio-tui"))
+HTTP_CACHE_FILE = os.path.join(CACHE_DIR, "http_cache.sqlite3")
+HTTP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# How long (seconds) a response stays fresh, per host. Hosts not listed use
+# HTTP_CACHE_DEFAULT_TTL; 0 means never cache (stream addons must stay live).
+# A redirect target that isn't listed gets the TTL of the host that redirected.
+HTTP_CACHE_TTLS = {
+    "api.tvmaze.com": 6 * 3600,
+    "v3-cinemeta.strem.io": 6 * 3600,
+    # Where v3-cinemeta 307s meta and catalog requests to
+    "cinemeta-live.strem.io": 6 * 3600,
+    "cinemeta-catalogs.strem.io": 6 * 3600,
+    "94c8cb9f702d-tmdb-addon.baby-beamup.club": 12 * 3600,
+    "www.omdbapi.com": 24 * 3600,
+    "graphql.anilist.co": 24 * 3600,
+    "v3.sg.media-imdb.com": 24 * 3600,
+}
+HTTP_CACHE_DEFAULT_TTL = 0
+
+# Per-host request budgets as (requests, per_seconds). Hosts not listed are not throttled.
+HOST_RATE_LIMITS = {
+    "api.tvmaze.com": (20, 10),
+    "graphql.anilist.co": (90, 60),
+    "www.omdbapi.com": (10, 1),
+}
+# Retries for a 429 / 503 before giving the error back to the caller.
+RATE_LIMIT_MAX_RETRIES = 3
+# Longest pause (s) taken for one Retry-After, whatever the server asks for.
+RATE_LIMIT_MAX_RETRY_AFTER = 5.0
+
+# --- IMAGES ---
+# Simultaneous poster downloads; the rest wait in a priority queue.
+IMAGE_MAX_CONCURRENCY = 6
+# Decoded images are shrunk to fit this box (pixels) and kept under this many bytes.
+IMAGE_MAX_SIZE = (320, 480)
+IMAGE_CACHE_MAX_BYTES = 48 * 1024 * 1024
+# Threads that decode and resize images off the event loop (0 = decode inline).
+IMAGE_DECODE_WORKERS = 2
+
+# --- SEARCH ---
+# Search while typing (debounced); Enter still runs a full search.
+SEARCH_AS_YOU_TYPE = True
+SEARCH_DEBOUNCE = 0.25
+SEARCH_MIN_CHARS = 2
+# Remembered queries for instant prefix answers.
+SEARCH_CACHE_SIZE = 128
+
+# Local full-text index of Cinemeta catalogs, searched before the network.
+CATALOG_INDEX_FILE = os.path.join(CACHE_DIR, "catalog.sqlite3")
+CATALOG_SOURCES = [("series", "top"), ("series", "imdbRating"), ("movie", "top"), ("movie", "imdbRating")]
+CATALOG_PAGES = 3
+CATALOG_REFRESH_INTERVAL = 12 * 3600
+
+# --- PREFETCH ---
+# Rows around the list cursor kept warm (metadata / posters) in the background.
+PREFETCH_AHEAD = 10
+PREFETCH_BEHIND = 3
+# The window also stretches by this many seconds of cursor travel, up to PREFETCH_MAX_EXTRA rows.
+PREFETCH_LOOKAHEAD = 1.0
+PREFETCH_MAX_EXTRA = 40
+PREFETCH_CONCURRENCY = 4
+# While an episode plays, resolve streams / ratings / thumbnail for the next one.
+WARM_NEXT_EPISODE = True
+
+# --- METADATA ---
+# Resolve TVMaze / TMDB / name search concurrently instead of one after another.
+METADATA_CONCURRENT = True
+# Seconds to give a source before speculatively starting the next fallback.
+METADATA_HEDGE_DELAY = 0.4
+
+# --- STREAM ADDONS ---
+# Each provider may set its own "timeout" (seconds for the whole request).
+PROVIDER_DEFAULT_TIMEOUT = 10.0
+# Skip an addon for PROVIDER_BREAKER_COOLDOWN seconds after this many failures in a row.
+PROVIDER_BREAKER_THRESHOLD = 3
+PROVIDER_BREAKER_COOLDOWN = 120
+
+# Addon answers per episode/movie, kept on disk so reopening a stream list
+# (or resuming from history) is instant. Younger than STREAM_CACHE_TTL is
+# shown as is; older (up to STREAM_CACHE_MAX_AGE) is shown while the addon
+# is asked again in the background.
+STREAM_CACHE_FILE = os.path.join(CACHE_DIR, "streams.sqlite3")
+STREAM_CACHE_TTL = 15 * 60
+STREAM_CACHE_MAX_AGE = 3 * 24 * 3600
+
+# --- STREAM RANKING ---
+# Streams from all addons are merged by infoHash+fileIdx and sorted best first.
+# Caps: hide anything bigger than this (GB, None = no limit) or with fewer seeds.
+# Streams without a seed count (debrid / direct links) are never hidden by it.
+STREAM_MAX_SIZE_GB = None
+STREAM_MIN_SEEDS = 0
+# "4K", "1080p", "720p", "480p" or None. The closest resolution ranks first.
+STREAM_PREFERRED_RESOLUTION = None
+
 PROVIDERS = [
     {
         "name": "Torrentio",
-        "url": "https://torrentio.strem.fun/qualityfilter=480p,other,scr,cam,unknown/manifest.json"
+        "url": "https://torrentio.strem.fun/qualityfilter=480p,other,scr,cam,unknown/manifest.json",
+        "timeout": 8.0
     },
     {
         "name": "Comet",
-        "url": "https://comet.elfhosted.com/manifest.json" 
+        "url": "https://comet.elfhosted.com/manifest.json",
+        "timeout": 10.0
     }
 ]
+
+# --- PLAYER ---
+# "terminal": the TUI steps aside while webtorrent/mpv run in the terminal.
+# "window": mpv opens its own window and the TUI stays usable meanwhile.
+PLAYER_MODE = "terminal"
+# Where mpv's IPC sockets go (None = a private folder under the system temp dir).
+PLAYER_IPC_DIR = None
+# How long to wait for mpv to come up (webtorrent needs the torrent metadata first).
+PLAYER_CONNECT_TIMEOUT = 120
+
+# Downloaded torrents, kept between plays so a resume starts from local pieces.
+# Least recently played ones are deleted once the folder grows past the quota.
+TORRENT_CACHE_DIR = os.path.join(CACHE_DIR, "torrents")
+TORRENT_CACHE_MAX_GB = 20
@@ -1,25 +1,197 @@
-# core/cache.py
+import asyncio
+import heapq
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import httpx
 from io import BytesIO
 from PIL import Image
 
+from api.base import SingleFlight
+from api.scheduler import current_lane
+from config import (
+    IMAGE_MAX_CONCURRENCY, IMAGE_CACHE_MAX_BYTES, IMAGE_MAX_SIZE,
+    IMAGE_DECODE_WORKERS,
+)
+
+def decode_image(data, max_size=IMAGE_MAX_SIZE):
+    """
+    Fully decodes and shrinks an image so the UI only ever paints it.
+    Image.open is lazy, so without load() the real decode would happen
+    later on the UI thread when the sidebar renders it.
+    """
+    img = Image.open(BytesIO(data))
+    # JPEGs: let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of full size
+    img.draft("RGB", max_size)
+    img.thumbnail(max_size)
+    img.load()
+    return img
+
+class PriorityLimiter:
+    """
+    At most `limit` holders at a time; waiters are served lowest priority
+    value first and can be promoted while they wait.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self._heap = []
+        self._waiting = {}
+        self._seq = itertools.count()
+
+    async def acquire(self, key, priority):
+        if self.active < self.limit and not self._waiting:
+            self.active += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[key] = (priority, fut)
+        heapq.heappush(self._heap, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Handed a slot in the same tick we were cancelled -> give it back
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        finally:
+            if self._waiting.get(key, (None, None))[1] is fut:
+                del self._waiting[key]
+
+    def promote(self, key, priority):
+        waiting = self._waiting.get(key)
+        if waiting and priority < waiting[0]:
+            fut = waiting[1]
+            self._waiting[key] = (priority, fut)
+            # The old heap entry shares the future and is skipped once it is done
+            heapq.heappush(self._heap, (priority, next(self._seq), fut))
+
+    def release(self):
+        self.active -= 1
+        while self._heap and self.active < self.limit:
+            _, _, fut = heapq.heappop(self._heap)
+            if not fut.done():
+                self.active += 1
+                fut.set_result(None)
+
+class ImageLRU:
+    """
+    Decoded images, least-recently-used first out once their pixel
+    memory goes over `max_bytes`.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def image_bytes(img):
+        return img.width * img.height * len(img.getbands())
+
+    def __contains__(self, url):
+        return url in self._items
+
+    def get(self, url):
+        entry = self._items.get(url)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(url)
+        return entry[0]
+
+    def put(self, url, img):
+        size = self.image_bytes(img)
+        if url in self._items:
+            self.bytes -= self._items.pop(url)[1]
+        self._items[url] = (img, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            _, (_, old_size) = self._items.popitem(last=False)
+            self.bytes -= old_size
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "items": len(self._items),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
 class ImageCache:
-    def __init__(self):
-        self._cache = {}
+    """
+    Poster / thumbnail downloads on one pooled HTTP client.
+    At most IMAGE_MAX_CONCURRENCY downloads run at once; queued ones are
+    ordered by request lane (the highlighted item before prefetch), and a
+    download is dropped as soon as nobody is waiting for it any more.
+    Images are decoded and shrunk to IMAGE_MAX_SIZE in a worker pool before
+    they are cached, since the sidebar never shows more than a ~30 cell wide
+    poster and decoding on the event loop stalls key handling.
+    Pass decode_workers=0 to decode on the event loop (benchmarks).
+    """
+    def __init__(self, decode_workers=IMAGE_DECODE_WORKERS):
+        self._cache = ImageLRU(IMAGE_CACHE_MAX_BYTES)
+        self._decoder = ThreadPoolExecutor(decode_workers, thread_name_prefix="img") if decode_workers else None
+        self._client = None
+        self._slots = PriorityLimiter(IMAGE_MAX_CONCURRENCY)
+        # Two workers asking for the same poster share one download
+        self._inflight = SingleFlight()
+
+    def has(self, url):
+        return url in self._cache
 
-    async def get_image(self, url):
+    async def get_image(self, url, priority=None):
         """Downloads image if not cached, returns PIL Image object."""
         if not url: return None
-        if url in self._cache:
-            return self._cache[url]
-            
+        img = self._cache.get(url)
+        if img is not None:
+            return img
+        if priority is None:
+            priority = current_lane()
+        # If it is already queued by someone less urgent, move it up
+        self._slots.promote(url, priority)
+        return await self._inflight.do(url, self._download, url, priority)
+
+    async def _download(self, url, priority):
+        await self._slots.acquire(url, priority)
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(url, timeout=4.0)
-                if resp.status_code == 200:
-                    img = Image.open(BytesIO(resp.content))
-                    self._cache[url] = img
-                    return img
+            if self._client is None:
+                self._client = httpx.AsyncClient(
+                    timeout=4.0,
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=IMAGE_MAX_CONCURRENCY * 2),
+                )
+            resp = await self._client.get(url)
+            if resp.status_code == 200:
+                img = await self.decode(resp.content)
+                self._cache.put(url, img)
+                return img
+        except asyncio.CancelledError:
+            raise
         except:
             pass
+        finally:
+            self._slots.release()
         return None
+
+    async def decode(self, data):
+        if self._decoder is None:
+            return decode_image(data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._decoder, decode_image, data)
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats.update(self._inflight.stats())
+        return stats
+
+    async def close(self):
+        if self._client:
+            await self._client.aclose()
+        if self._decoder:
+            self._decoder.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,157 @@
+# core/catalog.py
+import re
+import sqlite3
+import threading
+import time
+
+from api.db import open_db
+from config import CATALOG_INDEX_FILE, CATALOG_SOURCES, CATALOG_PAGES, CATALOG_REFRESH_INTERVAL
+
+# Cinemeta types -> the type strings IMDb search results use, so both
+# kinds of result behave the same in the list and the screens.
+TYPE_MAP = {"movie": "feature", "series": "TV series"}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class CatalogIndex:
+    """
+    On-disk full-text index of Cinemeta catalogs (SQLite FTS5, or a plain
+    LIKE scan when FTS5 isn't compiled in). Searching it needs no network;
+    refresh() re-pulls only the catalogs that are older than
+    CATALOG_REFRESH_INTERVAL and upserts what changed.
+    """
+    def __init__(self, path=CATALOG_INDEX_FILE):
+        self._lock = threading.Lock()
+        self.has_fts = False
+        self._db = open_db(path, self._setup)
+
+    def _setup(self, db):
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                year TEXT,
+                type TEXT,
+                poster TEXT,
+                popularity INTEGER
+            )
+        """)
+        db.execute("CREATE TABLE IF NOT EXISTS catalogs (name TEXT PRIMARY KEY, refreshed_at REAL)")
+        try:
+            db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+                "title, content='items', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+            )
+            # Keep the FTS index in step with the items table
+            db.executescript("""
+                CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+                    INSERT INTO items_fts(rowid, title) VALUES (new.rowid, new.title);
+                END;
+                CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+                    INSERT INTO items_fts(items_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+                END;
+                CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE OF title ON items BEGIN
+                    INSERT INTO items_fts(items_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+                    INSERT INTO items_fts(rowid, title) VALUES (new.rowid, new.title);
+                END;
+            """)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+
+    def __len__(self):
+        if not self._db: return 0
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def search(self, query, limit=20):
+        """Ranked matches for a (partial) title, best first. Never touches the network."""
+        words = _WORD.findall(query.lower())
+        if not self._db or not words: return []
+
+        with self._lock:
+            if self.has_fts:
+                # Every word must match; the last one may still be half typed
+                match = " ".join(f'"{w}"' for w in words[:-1])
+                match = f'{match} "{words[-1]}"*'.strip()
+                rows = self._db.execute("""
+                    SELECT items.id, items.title, items.year, items.type, items.poster
+                    FROM items_fts JOIN items ON items.rowid = items_fts.rowid
+                    WHERE items_fts MATCH ?
+                    ORDER BY bm25(items_fts), items.popularity
+                    LIMIT ?
+                """, (match, limit)).fetchall()
+            else:
+                clause = " AND ".join("lower(title) LIKE ?" for _ in words)
+                rows = self._db.execute(
+                    f"SELECT id, title, year, type, poster FROM items WHERE {clause} ORDER BY popularity LIMIT ?",
+                    [f"%{w}%" for w in words] + [limit]
+                ).fetchall()
+
+        return [
+            {"title": r[1], "year": r[2], "type": r[3], "id": r[0], "poster": r[4]}
+            for r in rows
+        ]
+
+    def upsert(self, items):
+        """items: catalog results as returned by get_catalog_cinemeta, in catalog order."""
+        if not self._db or not items: return
+        rows = [
+            (it['id'], it.get('title'), it.get('year'), TYPE_MAP.get(it.get('type'), it.get('type')), it.get('poster'), pos)
+            for pos, it in enumerate(items) if it.get('id')
+        ]
+        with self._lock:
+            self._db.execute("BEGIN")
+            # Only rewrite rows that actually changed; popularity keeps the best rank seen
+            self._db.executemany("""
+                INSERT INTO items (id, title, year, type, poster, popularity) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    year = excluded.year,
+                    type = excluded.type,
+                    poster = excluded.poster,
+                    popularity = MIN(items.popularity, excluded.popularity)
+                WHERE items.title IS NOT excluded.title
+                   OR items.year IS NOT excluded.year
+                   OR items.poster IS NOT excluded.poster
+                   OR items.popularity > excluded.popularity
+            """, rows)
+            self._db.execute("COMMIT")
+
+    def stale_catalogs(self, now=None):
+        if not self._db: return []
+        now = now or time.time()
+        with self._lock:
+            done = dict(self._db.execute("SELECT name, refreshed_at FROM catalogs").fetchall())
+        return [
+            (type_, id_) for type_, id_ in CATALOG_SOURCES
+            if now - done.get(f"{type_}/{id_}", 0) > CATALOG_REFRESH_INTERVAL
+        ]
+
+    def mark_refreshed(self, type_, id_):
+        if not self._db: return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO catalogs VALUES (?, ?)", (f"{type_}/{id_}", time.time())
+            )
+
+    async def refresh(self, client):
+        """Pulls stale catalogs from Cinemeta. Returns how many items were fetched."""
+        fetched = 0
+        for type_, id_ in self.stale_catalogs():
+            items = []
+            for _ in range(CATALOG_PAGES):
+                page = await client.get_catalog_cinemeta(type_, id_, skip=len(items))
+                if not page: break
+                items.extend(page)
+            if items:
+                self.upsert(items)
+                self.mark_refreshed(type_, id_)
+                fetched += len(items)
+        return fetched
+
+    def close(self):
+        if self._db:
+            self._db.close()
+            self._db = None
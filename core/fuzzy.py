@@ -0,0 +1,110 @@
+# core/fuzzy.py
+import re
+
+# fzf-style scoring: every matched character scores, matches right after a
+# word boundary or right after the previous match score extra, gaps cost.
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8
+BONUS_CONSECUTIVE = 5
+BONUS_FIRST_CHAR = 2  # multiplier for the first query character's bonus
+PENALTY_GAP_START = 3
+PENALTY_GAP_EXTENSION = 1
+
+SEPARATORS = frozenset(" ._-/|:()[]{}'\",+&")
+
+
+def _pattern(query):
+    # a[^b]*?b[^c]*?c ...: leftmost match, each character as early as possible
+    parts = [re.escape(query[0])]
+    for c in query[1:]:
+        parts.append(f"[^{re.escape(c)}]*{re.escape(c)}")
+    return re.compile("".join(parts))
+
+
+def _boundary_pattern(c):
+    # c at the start or right after a separator: the one bonus a 1-key query can get
+    return re.compile(f"(?:^|[{re.escape(''.join(sorted(SEPARATORS)))}]){re.escape(c)}")
+
+
+def score_match(text, query, end):
+    """
+    fzf's score for `query` matched in `text` by a forward search ending at
+    `end`. Walks back from there to the latest start first (fzf's v1 second
+    pass), so "abc" in "a_ab_c" is scored on the tighter "ab_c".
+    """
+    score = 0
+    i = end
+    nxt = nxt_bonus = None
+    for n in range(len(query) - 1, -1, -1):
+        p = text.rfind(query[n], 0, i)
+        bonus = BONUS_BOUNDARY if p == 0 or text[p - 1] in SEPARATORS else 0
+        if nxt is not None:
+            # The later character's bonus is only known now: was it right after this one?
+            if nxt == p + 1:
+                nxt_bonus = max(nxt_bonus, BONUS_CONSECUTIVE)
+            else:
+                score -= PENALTY_GAP_START + PENALTY_GAP_EXTENSION * (nxt - p - 2)
+            score += nxt_bonus
+        nxt, nxt_bonus, i = p, bonus, p
+    return score + nxt_bonus * BONUS_FIRST_CHAR + SCORE_MATCH * len(query)
+
+
+class FuzzyIndex:
+    """
+    Subsequence filter over a fixed list of strings (row labels), built once
+    per list. Each row keeps its lowercased text and its set of characters;
+    a query first drops rows missing any of its characters (a set check in
+    C), then a compiled regex finds the match and fzf's rules score it.
+
+    search() is incremental: when the query extends the previous one, only
+    the previous matches are looked at again. Smart case as in fzf: an
+    uppercase letter in the query makes it case-sensitive.
+    """
+    def __init__(self, texts):
+        self.texts = [t or "" for t in texts]
+        self.lower = [t.lower() for t in self.texts]
+        self.charsets = [frozenset(t) for t in self.lower]
+        self._last_query = None
+        self._last_hits = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query):
+        """Row indexes matching `query`, best first (all rows, in order, for an empty query)."""
+        if not query:
+            self._last_query = self._last_hits = None
+            return list(range(len(self.texts)))
+
+        case_sensitive = query != query.lower()
+        texts = self.texts if case_sensitive else self.lower
+        # Narrowing the last query: its non-matches can't match this one either
+        if self._last_query and query.startswith(self._last_query) and self._last_hits is not None:
+            candidates = self._last_hits
+        else:
+            candidates = range(len(self.texts))
+
+        wanted = frozenset(query.lower())
+        charsets = self.charsets
+        candidates = [i for i in candidates if wanted <= charsets[i]]
+
+        # Best score, then the shorter label, then the original order
+        if len(query) == 1:
+            # Every candidate matches; only the boundary bonus tells them apart
+            top = SCORE_MATCH + BONUS_BOUNDARY * BONUS_FIRST_CHAR
+            boundary = _boundary_pattern(query).search
+            scored = [(-top if boundary(texts[i]) else -SCORE_MATCH, len(texts[i]), i) for i in candidates]
+        else:
+            search = _pattern(query).search
+            scored = []
+            for i in candidates:
+                text = texts[i]
+                m = search(text)
+                if m is None: continue
+                scored.append((-score_match(text, query, m.end()), len(text), i))
+        scored.sort()
+
+        hits = [i for _, _, i in scored]
+        self._last_query = query
+        self._last_hits = sorted(hits)
+        return hits
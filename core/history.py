@@ -1,27 +1,69 @@
 # core/history.py
 import json
 import os
+import queue
+import sqlite3
+import threading
+import time
 from datetime import datetime
 
-HISTORY_FILE = "history.json"
+from api.db import connect, open_db
+from config import HISTORY_DB_FILE, LEGACY_HISTORY_FILE, HISTORY_VIEW_LIMIT
 
-class HistoryManager:
-    def __init__(self):
-        self.history = self._load_history()
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-    def _load_history(self):
-        if not os.path.exists(HISTORY_FILE):
-            return {}
-        try:
-            with open(HISTORY_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+# Movies have no season/episode; stored as -1 so they can be part of the key
+NO_NUMBER = -1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watched (
+    imdb_id TEXT,
+    season INTEGER,
+    episode INTEGER,
+    title TEXT,
+    year TEXT,
+    type TEXT,
+    stream_link TEXT,
+    last_watched REAL,
+    PRIMARY KEY (imdb_id, season, episode)
+);
+-- Latest episode per show, so the history view is an index scan of N rows
+CREATE TABLE IF NOT EXISTS shows (
+    imdb_id TEXT PRIMARY KEY,
+    season INTEGER,
+    episode INTEGER,
+    last_watched REAL
+);
+CREATE INDEX IF NOT EXISTS idx_shows_last_watched ON shows(last_watched DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
 
-    def save_history(self):
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(self.history, f, indent=4)
 
+class HistoryManager:
+    """
+    Watch history in SQLite (WAL), one row per episode watched. Writes are
+    queued to a background thread (write-behind), so a play never waits on
+    the disk. Reads never wait for it either: they read what is committed
+    (WAL readers don't block on the writer) and lay the rows still queued
+    on top, so they always see the latest.
+    Several running instances can share the file: each write is an upsert
+    of its own row rather than a rewrite of the whole history.
+    """
+    def __init__(self, path=HISTORY_DB_FILE, legacy_file=LEGACY_HISTORY_FILE):
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = {}  # (imdb_id, season, episode) -> row queued but not committed yet
+        self._writer = None
+        self._db = open_db(path, lambda db: db.executescript(SCHEMA))
+        if not self._db: return
+        try:
+            self._migrate_json(legacy_file)
+        except sqlite3.Error:
+            pass  # not marked as migrated, so the next start tries again
+        self._writer = threading.Thread(target=self._write_loop, args=(path,), name="history-writer", daemon=True)
+        self._writer.start()
+
+    # --- Writes ---
     def add_entry(self, item_data):
         """
         item_data: {
@@ -35,18 +77,159 @@ class HistoryManager:
         }
         """
         imdb_id = item_data.get('imdb_id')
-        if not imdb_id: return
-
-        # Add Timestamp of "When you clicked play"
-        item_data['last_watched'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Save (Overwrites previous entry for this Show ID)
-        self.history[imdb_id] = item_data
-        self.save_history()
-
-    def get_sorted_history(self):
-        """Returns list of items sorted by most recently watched."""
-        items = list(self.history.values())
-        # Sort by date string (Descending)
-        items.sort(key=lambda x: x.get('last_watched', ''), reverse=True)
-        return items
+        if not imdb_id or not self._writer: return
+
+        # Timestamp of "When you clicked play"
+        row = self._row(item_data, time.time())
+        with self._lock:
+            self._pending[row[:3]] = row
+        self._queue.put(row)
+
+    def _row(self, item_data, watched_at):
+        season = item_data.get('season')
+        episode = item_data.get('episode')
+        return (
+            item_data['imdb_id'],
+            NO_NUMBER if season is None else int(season),
+            NO_NUMBER if episode is None else int(episode),
+            item_data.get('title'), item_data.get('year'), item_data.get('type'),
+            item_data.get('stream_link'), watched_at,
+        )
+
+    def _write_loop(self, path):
+        db = connect(path)
+        while True:
+            rows = [self._queue.get()]
+            # Whatever piled up meanwhile goes into the same transaction
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in rows
+            rows = [r for r in rows if r is not None]
+            try:
+                if rows: self._write(db, rows)
+            except sqlite3.Error:
+                pass
+            finally:
+                # Written (or given up on): reads go back to the database for these
+                with self._lock:
+                    for r in rows:
+                        if self._pending.get(r[:3]) is r:
+                            del self._pending[r[:3]]
+                for _ in range(len(rows) + (1 if stop else 0)):
+                    self._queue.task_done()
+            if stop: break
+        db.close()
+
+    def _write(self, db, rows):
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany("INSERT OR REPLACE INTO watched VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            db.executemany("""
+                INSERT INTO shows VALUES (?, ?, ?, ?)
+                ON CONFLICT(imdb_id) DO UPDATE SET
+                    season = excluded.season,
+                    episode = excluded.episode,
+                    last_watched = excluded.last_watched
+                WHERE excluded.last_watched >= shows.last_watched
+            """, [(r[0], r[1], r[2], r[7]) for r in rows])
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+
+    def flush(self):
+        """Blocks until every queued write is on disk."""
+        if self._writer: self._queue.join()
+
+    # --- Reads ---
+    def get_sorted_history(self, limit=HISTORY_VIEW_LIMIT):
+        """Latest episode of each show, most recently watched first."""
+        if not self._db: return []
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT w.imdb_id, w.season, w.episode, w.title, w.year, w.type, w.stream_link, w.last_watched
+                FROM shows s JOIN watched w
+                  ON w.imdb_id = s.imdb_id AND w.season = s.season AND w.episode = s.episode
+                ORDER BY s.last_watched DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+            pending = list(self._pending.values())
+
+        # A queued row only ever makes its show more recent, so the top
+        # `limit` from disk plus the queue still holds the real top `limit`
+        latest = {r[0]: r for r in rows}
+        for r in pending:
+            if r[0] not in latest or r[7] >= latest[r[0]][7]:
+                latest[r[0]] = r
+        rows = sorted(latest.values(), key=lambda r: r[7], reverse=True)[:limit]
+        return [self._entry(r) for r in rows]
+
+    def get_episodes(self, imdb_id):
+        """Every episode watched of one show, most recent first."""
+        if not self._db: return []
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT imdb_id, season, episode, title, year, type, stream_link, last_watched
+                FROM watched WHERE imdb_id = ?
+            """, (imdb_id,)).fetchall()
+            pending = [r for r in self._pending.values() if r[0] == imdb_id]
+
+        episodes = {r[:3]: r for r in rows}
+        episodes.update((r[:3], r) for r in pending)
+        rows = sorted(episodes.values(), key=lambda r: r[7], reverse=True)
+        return [self._entry(r) for r in rows]
+
+    def _entry(self, row):
+        imdb_id, season, episode, title, year, type_, stream_link, watched_at = row
+        return {
+            'imdb_id': imdb_id,
+            'title': title,
+            'year': year,
+            'type': type_,
+            'season': None if season == NO_NUMBER else season,
+            'episode': None if episode == NO_NUMBER else episode,
+            'stream_link': stream_link,
+            'last_watched': datetime.fromtimestamp(watched_at).strftime(TIME_FORMAT),
+        }
+
+    # --- Migration ---
+    def _migrate_json(self, legacy_file):
+        """Imports the old history.json once, then renames it out of the way."""
+        if not legacy_file or not os.path.exists(legacy_file): return
+        if self._db.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone(): return
+        try:
+            with open(legacy_file, 'r') as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        rows = []
+        for item in (old.values() if isinstance(old, dict) else []):
+            if not isinstance(item, dict) or not item.get('imdb_id'): continue
+            try:
+                watched_at = datetime.strptime(item.get('last_watched', ''), TIME_FORMAT).timestamp()
+            except ValueError:
+                watched_at = 0.0
+            try:
+                rows.append(self._row(item, watched_at))
+            except (TypeError, ValueError):
+                continue
+
+        self._write(self._db, rows)
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_json', ?)", (str(time.time()),))
+        try:
+            os.replace(legacy_file, legacy_file + ".migrated")
+        except OSError:
+            pass
+
+    def close(self):
+        if self._writer:
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+            self._writer = None
+        if self._db:
+            self._db.close()
+            self._db = None
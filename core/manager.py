@@ -1,13 +1,32 @@
 # core/manager.py
+import asyncio
 from api import StremioClient
+from api.base import SingleFlight
+from api.scheduler import priority, PRIORITY_BACKGROUND
 from core.cache import ImageCache
 from core.history import HistoryManager
+from core.catalog import CatalogIndex
+from core.streams import parse_streams, rank_streams
+from core.stream_cache import StreamCache
+from core.torrent_cache import TorrentCache
+from core.player import Player
+from core.utils import group_by_season, next_episode
+from config import METADATA_CONCURRENT, METADATA_HEDGE_DELAY, PROVIDERS
 
 class MediaManager:
     def __init__(self):
         self.client = StremioClient()
         self.images = ImageCache()
         self.history = HistoryManager()
+        self.catalog = CatalogIndex()
+        self.stream_cache = StreamCache()
+        self.torrents = TorrentCache()
+        self.player = Player(self.torrents)
+        # Stremio id -> background refresh of stale cached streams
+        self._revalidating = {}
+        self._warmup = None
+        # The sidebar and the prefetcher often ask for the same id at once
+        self._metadata_flight = SingleFlight()
     
     def add_to_history(self, data):
         self.history.add_entry(data)
@@ -22,31 +41,103 @@ class MediaManager:
         return await self.images.get_image(url)
 
     async def get_unified_metadata(self, imdb_id: str, title: str):
-        # 1. Try TVMaze First (Rich Data)
-        meta = await self.client.get_series_details_tvmaze(imdb_id)
-        
-        # 2. Fallback to TMDB (This fixes your Stranger Things issue!)
-        if not meta:
-            meta = await self.client.get_series_details_tmdb(imdb_id)
-        
-        # 3. Fallback to Search
-        if not meta:
-            meta = await self.client.search_tvmaze_by_name(title)
-
-        # 4. Enrich with Cinemeta (Ratings/Country)
-        cinemeta_data = await self.client.get_series_details_cinemeta(imdb_id)
-        if cinemeta_data and meta:
-            if cinemeta_data.get('imdbRating'):
-                meta['rating'] = cinemeta_data.get('imdbRating')
-            if not meta.get('genres') and cinemeta_data.get('genres'):
-                meta['genres'] = cinemeta_data.get('genres')
-            
-            # Country Fallback (Crucial for Anime detection)
-            if (not meta.get('country') or meta.get('country') == "Unknown") and cinemeta_data.get('country'):
-                meta['country'] = cinemeta_data.get('country')
+        return await self._metadata_flight.do(imdb_id, self._resolve_metadata, imdb_id, title)
+
+    def _metadata_sources(self, imdb_id, title):
+        """Base record sources, highest priority first. The first one that answers wins."""
+        return [
+            ("tvmaze", lambda: self.client.get_series_details_tvmaze(imdb_id)),
+            # Fallback to TMDB (This fixes your Stranger Things issue!)
+            ("tmdb", lambda: self.client.get_series_details_tmdb(imdb_id)),
+            ("tvmaze_search", lambda: self.client.search_tvmaze_by_name(title)),
+        ]
+
+    async def _resolve_metadata(self, imdb_id: str, title: str):
+        if METADATA_CONCURRENT:
+            return await self._resolve_metadata_hedged(imdb_id, title)
+
+        meta = None
+        for _, fetch in self._metadata_sources(imdb_id, title):
+            meta = await fetch()
+            if meta: break
 
+        # Enrich with Cinemeta (Ratings/Country)
+        if meta:
+            cinemeta_data = await self.client.get_series_details_cinemeta(imdb_id)
+            self._enrich_with_cinemeta(meta, cinemeta_data)
         return meta
 
+    async def _resolve_metadata_hedged(self, imdb_id: str, title: str):
+        """
+        Starts the primary source and Cinemeta together. Each fallback is started
+        early if the sources ahead of it haven't answered within METADATA_HEDGE_DELAY,
+        or immediately once they have all failed. The highest-priority source with
+        data wins and everything still running below it is cancelled.
+        """
+        sources = self._metadata_sources(imdb_id, title)
+        cinemeta_task = asyncio.create_task(self.client.get_series_details_cinemeta(imdb_id))
+        tasks = [asyncio.create_task(sources[0][1]())]
+        meta = None
+
+        try:
+            while True:
+                # Walk in priority order until we hit a source that is still running
+                decided = False
+                for task in tasks:
+                    if not task.done(): break
+                    result = self._task_result(task)
+                    if result:
+                        meta = result
+                        decided = True
+                        break
+                else:
+                    # Everything started so far has failed
+                    if len(tasks) == len(sources):
+                        decided = True
+                    else:
+                        tasks.append(asyncio.create_task(sources[len(tasks)][1]()))
+                        continue
+                if decided: break
+
+                pending = [t for t in tasks if not t.done()]
+                # No point hedging further once a lower-priority source has data
+                can_hedge = len(tasks) < len(sources) and not any(self._task_result(t) for t in tasks)
+                timeout = METADATA_HEDGE_DELAY if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done and can_hedge:
+                    # Hedge: the sources ahead are slow, start the next one speculatively
+                    tasks.append(asyncio.create_task(sources[len(tasks)][1]()))
+        finally:
+            for task in tasks:
+                if not task.done(): task.cancel()
+            if not meta:
+                cinemeta_task.cancel()
+
+        if meta:
+            try:
+                cinemeta_data = await cinemeta_task
+            except Exception:
+                cinemeta_data = {}
+            self._enrich_with_cinemeta(meta, cinemeta_data)
+        return meta
+
+    @staticmethod
+    def _task_result(task):
+        if not task.done() or task.cancelled() or task.exception():
+            return None
+        return task.result()
+
+    def _enrich_with_cinemeta(self, meta, cinemeta_data):
+        if not cinemeta_data or not meta: return
+        if cinemeta_data.get('imdbRating'):
+            meta['rating'] = cinemeta_data.get('imdbRating')
+        if not meta.get('genres') and cinemeta_data.get('genres'):
+            meta['genres'] = cinemeta_data.get('genres')
+        
+        # Country Fallback (Crucial for Anime detection)
+        if (not meta.get('country') or meta.get('country') == "Unknown") and cinemeta_data.get('country'):
+            meta['country'] = cinemeta_data.get('country')
+
     async def fetch_season_ratings(self, imdb_id, season_num):
         return await self.client.get_omdb_season_ratings(imdb_id, season_num)
         
@@ -72,11 +163,8 @@ class MediaManager:
 
         # --- PATH A: ANIME (AniList) ---
         if is_anime:
-            results = {}
-            for s_num in season_keys:
-                anilist_data = await self.client.get_anilist_season_data(show_title, s_num)
-                if anilist_data:
-                    results[s_num] = anilist_data
+            # One aliased GraphQL request for every season
+            results = await self.client.get_anilist_all_seasons_data(show_title, season_keys)
             
             # Fallback to Western logic if AniList fails completely
             if results: 
@@ -86,10 +174,160 @@ class MediaManager:
         return await self.client.get_all_seasons_details_tvmaze(imdb_id)
 
     async def get_streams(self, type_, id_):
-        return await self.client.get_all_streams(type_, id_)
+        """
+        Every addon's result for `id_`, with result['parsed'] as in iter_streams.
+        Cached answers are returned straight away (stale ones are refreshed in
+        the background); only addons with nothing cached are waited on.
+        """
+        results, stale, missing = await self._cached_streams(id_)
+        if missing:
+            async for result in self._fetch_streams(type_, id_, missing):
+                results.append(result)
+        if stale:
+            self._revalidate_streams(type_, id_, stale)
+        return results
+
+    async def iter_streams(self, type_, id_, refresh=False):
+        """
+        Yields one provider result at a time, with result['parsed'] holding
+        its streams as StreamInfo rows. Cached answers come first (marked
+        result['cached'], with their 'age' in seconds); addons with a stale
+        or missing answer (or all of them, with refresh=True) are then asked
+        live and their results follow as they arrive.
+        """
+        results, stale, missing = await self._cached_streams(id_)
+        for result in results:
+            yield result
+
+        if refresh:
+            stale = [r['name'] for r in results]
+        ask = stale + missing
+        if not ask: return
+        # A background refresh for this id may already be running; this one replaces it
+        task = self._revalidating.pop(id_, None)
+        if task: task.cancel()
+        async for result in self._fetch_streams(type_, id_, ask):
+            yield result
+
+    async def _cached_streams(self, id_):
+        """(cached results, names of stale addons, names of addons with nothing cached)"""
+        # SQLite + JSON decoding, kept off the event loop like the HTTP cache
+        cached = await asyncio.to_thread(self.stream_cache.get, id_)
+        results, stale, missing = [], [], []
+        for provider in PROVIDERS:
+            name = provider['name']
+            if name not in cached:
+                missing.append(name)
+                continue
+            streams, age = cached[name]
+            fresh = self.stream_cache.is_fresh(age)
+            if not fresh: stale.append(name)
+            results.append({
+                "name": name, "streams": streams, "status": 200, "error": None,
+                "cached": True, "fresh": fresh, "age": age,
+                "parsed": parse_streams(streams, name),
+            })
+        return results, stale, missing
+
+    async def _fetch_streams(self, type_, id_, providers):
+        async for result in self.client.iter_streams(type_, id_, providers=providers):
+            result['parsed'] = parse_streams(result.get('streams'), result.get('name'))
+            # Only good answers replace what's cached
+            if result.get('error') is None:
+                await asyncio.to_thread(self.stream_cache.put, id_, result['name'], result.get('streams') or [])
+            yield result
+
+    def _revalidate_streams(self, type_, id_, providers):
+        if id_ in self._revalidating: return
+
+        async def refresh():
+            try:
+                async for _ in self._fetch_streams(type_, id_, providers):
+                    pass
+            finally:
+                if self._revalidating.get(id_) is task:
+                    del self._revalidating[id_]
+
+        with priority(PRIORITY_BACKGROUND):
+            task = asyncio.create_task(refresh())
+        self._revalidating[id_] = task
+
+    def warm_next_episode(self, imdb_id, title, season, episode, seasons_map=None):
+        """
+        Starts warming the episode after SxxEyy in the background: its
+        streams (into the stream cache), its season's ratings and its
+        thumbnail. Replaces any warm-up still running from an earlier launch.
+        """
+        if self._warmup: self._warmup.cancel()
+        with priority(PRIORITY_BACKGROUND):
+            self._warmup = asyncio.create_task(
+                self._warm_next_episode(imdb_id, title, season, episode, seasons_map)
+            )
+        return self._warmup
+
+    async def _warm_next_episode(self, imdb_id, title, season, episode, seasons_map):
+        if not seasons_map:
+            meta = await self.get_unified_metadata(imdb_id, title)
+            seasons_map = group_by_season((meta or {}).get('videos'))
+        found = next_episode(seasons_map, season, episode)
+        if not found: return None
+        next_season, ep = found
+
+        jobs = [self.get_streams("series", f"{imdb_id}:{next_season}:{ep['episode']}")]
+        if next_season != int(season):
+            jobs.append(self.fetch_season_ratings(imdb_id, next_season))
+        if ep.get('thumbnail'):
+            jobs.append(self.get_image(ep['thumbnail']))
+        await asyncio.gather(*jobs, return_exceptions=True)
+        return found
+
+    def rank_streams(self, infos):
+        """
+        Merges duplicates across addons, applies the STREAM_* caps from config
+        and sorts best first. Returns (rows, number hidden by the caps).
+        """
+        health = {h['name']: h for h in self.client.provider_health_summary() if h['calls']}
+        return rank_streams(infos, health)
+
+    async def trim_torrent_cache(self):
+        """Evicts old downloads past the quota, off the event loop. Returns bytes freed."""
+        return await self.torrents.cleanup_async()
+
+    def provider_health(self):
+        """Rolling latency / error stats per stream addon."""
+        return self.client.provider_health_summary()
 
     async def search_imdb(self, query):
         return await self.client.search_imdb(query)
 
+    def search_local(self, query, limit=20):
+        """Ranked matches from the offline catalog index (no network)."""
+        return self.catalog.search(query, limit)
+
+    async def refresh_catalog(self):
+        """Brings stale catalogs in the local index up to date."""
+        with priority(PRIORITY_BACKGROUND):
+            return await self.catalog.refresh(self.client)
+
+    def search_cached(self, query):
+        """Instant results from earlier queries, or None."""
+        return self.client.search_cached(query)
+
+    def coalescing_stats(self):
+        """How many requests were served by piggy-backing on one already in flight."""
+        return {
+            "http": self.client.request_stats(),
+            "metadata": self._metadata_flight.stats(),
+            "images": self.images.stats(),
+        }
+
     async def close(self):
+        for task in list(self._revalidating.values()):
+            task.cancel()
+        if self._warmup: self._warmup.cancel()
+        await self.player.close()
         await self.client.close()
+        await self.images.close()
+        self.catalog.close()
+        self.stream_cache.close()
+        self.history.close()
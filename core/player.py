@@ -0,0 +1,225 @@
+# core/player.py
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+
+from config import CACHE_DIR, PLAYER_IPC_DIR, PLAYER_CONNECT_TIMEOUT
+
+# mpv properties followed over IPC: observe id -> property name
+OBSERVED = {1: "time-pos", 2: "duration", 3: "pause", 4: "paused-for-cache", 5: "cache-buffering-state"}
+
+
+def webtorrent_command(link, out_dir, file_idx, ipc_path, windowed=False):
+    """Default launcher: webtorrent streams the torrent into out_dir and starts mpv on it."""
+    # webtorrent splits --player-args on spaces, so ipc_path must not contain any
+    player_args = f"--save-position-on-quit --input-ipc-server={ipc_path}"
+    if windowed: player_args += " --force-window=immediate"
+    cmd = ["webtorrent", link, "--out", out_dir, "--mpv", f"--player-args={player_args}"]
+    # Season packs: play the episode's file, not the biggest one
+    if file_idx is not None: cmd += ["--select", str(file_idx)]
+    return cmd
+
+
+class PlayerSession:
+    """
+    One running player. Its state (position, duration, paused, buffering)
+    is kept up to date from mpv's IPC socket; listeners added with watch()
+    are called with the session on every change and once more on exit.
+    """
+    def __init__(self, proc, ipc_path, link, title=None, out_dir=None, file_idx=None):
+        self.proc = proc
+        self.ipc_path = ipc_path
+        self.link = link
+        self.title = title
+        self.out_dir = out_dir
+        self.file_idx = file_idx
+
+        self.position = None
+        self.duration = None
+        self.paused = False
+        self.buffering = False
+        self.cache_percent = None
+        self.connected = False
+        self.exit_code = None
+
+        self._listeners = []
+        self._writer = None
+        self._request_ids = itertools.count(100)
+        self._pending = {}
+        self._done = asyncio.Event()
+        self._task = None
+
+    @property
+    def running(self):
+        return not self._done.is_set()
+
+    def watch(self, callback):
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+    def start(self, on_exit=None):
+        self._task = asyncio.create_task(self._run(on_exit))
+        return self
+
+    async def wait(self):
+        """Returns the exit code once the player has quit."""
+        await self._done.wait()
+        return self.exit_code
+
+    async def command(self, *args):
+        """Sends an mpv command (e.g. "set_property", "pause", True) and returns its data."""
+        if not self._writer: return None
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(json.dumps({"command": list(args), "request_id": request_id}).encode() + b"\n")
+            await self._writer.drain()
+            return await asyncio.wait_for(future, 5.0)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def stop(self, timeout=3.0):
+        """Asks mpv to quit, then terminates the launcher if it hangs around."""
+        if not self.running: return self.exit_code
+        await self.command("quit")
+        try:
+            await asyncio.wait_for(self.wait(), timeout)
+        except asyncio.TimeoutError:
+            try:
+                self.proc.terminate()
+            except ProcessLookupError:
+                pass
+        return await self.wait()
+
+    async def _run(self, on_exit):
+        ipc = asyncio.create_task(self._follow_ipc())
+        try:
+            self.exit_code = await self.proc.wait()
+        finally:
+            ipc.cancel()
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+            try:
+                os.unlink(self.ipc_path)
+            except OSError:
+                pass
+            self.connected = False
+            self._done.set()
+            if on_exit: on_exit(self)
+            self._notify()
+
+    async def _follow_ipc(self):
+        # The socket shows up once webtorrent has the metadata and starts mpv
+        reader = None
+        waited = 0.0
+        while reader is None:
+            if os.path.exists(self.ipc_path):
+                try:
+                    reader, self._writer = await asyncio.open_unix_connection(self.ipc_path)
+                    break
+                except OSError:
+                    pass
+            await asyncio.sleep(0.2)
+            waited += 0.2
+            if waited > PLAYER_CONNECT_TIMEOUT: return
+
+        self.connected = True
+        for observe_id, name in OBSERVED.items():
+            self._writer.write(json.dumps({"command": ["observe_property", observe_id, name]}).encode() + b"\n")
+        await self._writer.drain()
+        self._notify()
+
+        while True:
+            line = await reader.readline()
+            if not line: break
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            self._handle(msg)
+        self.connected = False
+        self._notify()
+
+    def _handle(self, msg):
+        if "request_id" in msg and "event" not in msg:
+            future = self._pending.get(msg["request_id"])
+            if future and not future.done():
+                future.set_result(msg.get("data") if msg.get("error") == "success" else None)
+            return
+
+        if msg.get("event") != "property-change": return
+        name, data = msg.get("name"), msg.get("data")
+        if name == "time-pos": self.position = data
+        elif name == "duration": self.duration = data
+        elif name == "pause": self.paused = bool(data)
+        elif name == "paused-for-cache": self.buffering = bool(data)
+        elif name == "cache-buffering-state": self.cache_percent = data
+        else: return
+        self._notify()
+
+
+class Player:
+    """
+    Launches webtorrent + mpv as a managed child process and follows it over
+    mpv's JSON IPC. Downloads go to the torrent's folder in the TorrentCache,
+    which stays pinned until the player exits.
+    `command` builds the argv (see webtorrent_command); swap it for a fake
+    mpv to run the whole thing without a real player (benchmarks/fake_mpv.py,
+    exercised by benchmarks/check_player.py).
+    """
+    def __init__(self, torrents, command=webtorrent_command, ipc_dir=PLAYER_IPC_DIR):
+        self.torrents = torrents
+        self.command = command
+        self.ipc_dir = ipc_dir or os.path.join(tempfile.gettempdir(), f"stremio-tui-{os.getuid()}")
+        self.session = None
+        self._ids = itertools.count(1)
+
+    def _env(self):
+        # Keeps WebTorrent's (Node) temp files on the physical disk, not /tmp
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        env = os.environ.copy()
+        env["TMPDIR"] = env["TEMP"] = env["TMP"] = CACHE_DIR
+        return env
+
+    async def play(self, link, file_idx=None, title=None, windowed=False):
+        """
+        Starts playing and returns the PlayerSession right away.
+        windowed=True keeps the launcher off the terminal (mpv gets its own
+        window) so the TUI can stay up while it plays.
+        """
+        if self.session and self.session.running:
+            await self.session.stop()
+
+        os.makedirs(self.ipc_dir, mode=0o700, exist_ok=True)
+        ipc_path = os.path.join(self.ipc_dir, f"mpv-{os.getpid()}-{next(self._ids)}.sock")
+        out_dir, file_idx = self.torrents.acquire(link, file_idx)
+
+        quiet = asyncio.subprocess.DEVNULL if windowed else None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self.command(link, out_dir, file_idx, ipc_path, windowed),
+                env=self._env(), stdin=quiet, stdout=quiet, stderr=quiet,
+            )
+        except OSError:
+            self.torrents.release(out_dir)
+            raise
+
+        self.session = PlayerSession(proc, ipc_path, link, title, out_dir, file_idx)
+        self.session.start(on_exit=lambda s: self.torrents.release(s.out_dir))
+        return self.session
+
+    async def close(self):
+        if self.session and self.session.running:
+            await self.session.stop()
@@ -0,0 +1,122 @@
+# core/prefetch.py
+import asyncio
+import time
+
+from api.scheduler import priority, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from config import (
+    PREFETCH_CONCURRENCY, PREFETCH_AHEAD, PREFETCH_BEHIND,
+    PREFETCH_LOOKAHEAD, PREFETCH_MAX_EXTRA,
+)
+
+
+class PrefetchScheduler:
+    """
+    Runs `warm(item)` for a list of items, at most `concurrency` at a time,
+    in the order given: the first (the row under the cursor) in the
+    interactive lane, the rest in the background lane. schedule() replaces the
+    wanted set: items that dropped out are no longer started, and work
+    already running for them is cancelled.
+    """
+    def __init__(self, warm, is_warm=None, key=None, concurrency=PREFETCH_CONCURRENCY):
+        self.warm = warm
+        self.is_warm = is_warm or (lambda k: False)
+        self.key = key or (lambda item: item['id'])
+        self.concurrency = concurrency
+        self._order = []
+        self._items = {}
+        self._running = {}
+        self._attempted = set()
+        self.fetched = 0
+        self.cancelled = 0
+
+    def schedule(self, items):
+        """items, most wanted first. Anything not in here is dropped."""
+        order, wanted = [], {}
+        for item in items:
+            if item is None: continue
+            k = self.key(item)
+            if k is None or k in wanted: continue
+            wanted[k] = item
+            order.append(k)
+
+        for k, task in list(self._running.items()):
+            if k not in wanted:
+                task.cancel()
+                self.cancelled += 1
+        self._order = order
+        self._items = wanted
+        # Don't retry failures while they stay in view, forget them once they leave
+        self._attempted &= wanted.keys()
+        self._fill()
+
+    def _fill(self):
+        for k in self._order:
+            if len(self._running) >= self.concurrency: break
+            if k in self._running or k in self._attempted or self.is_warm(k): continue
+            lane = PRIORITY_INTERACTIVE if k == self._order[0] else PRIORITY_BACKGROUND
+            with priority(lane):
+                task = asyncio.create_task(self.warm(self._items[k]))
+            task.add_done_callback(lambda t, k=k: self._finished(k, t))
+            self._running[k] = task
+
+    def _finished(self, k, task):
+        if self._running.get(k) is task:
+            del self._running[k]
+        if not task.cancelled():
+            # Failures count as attempted too, so they aren't hammered while in view
+            self._attempted.add(k)
+            if task.exception() is None:
+                self.fetched += 1
+        self._fill()
+
+    def cancel(self):
+        self.schedule([])
+
+
+class WindowPrefetcher:
+    """
+    Keeps the items around a list cursor warm. The window reaches further in
+    the direction of travel, and further still the faster the cursor moves
+    (PREFETCH_LOOKAHEAD seconds of travel); items that leave the window have
+    their work cancelled. Attach to a VimListView via its `prefetcher`.
+    """
+    def __init__(self, scheduler, ahead=PREFETCH_AHEAD, behind=PREFETCH_BEHIND):
+        self.scheduler = scheduler
+        self.ahead = ahead
+        self.behind = behind
+        self.items = []
+        self.velocity = 0.0  # rows per second, negative = moving up
+        self._last_index = None
+        self._last_time = 0.0
+
+    def set_items(self, items):
+        """Rows of the list, one entry per row (None for rows with nothing to warm)."""
+        self.items = list(items)
+        self.velocity = 0.0
+        self._last_index = None
+        if not self.items:
+            self.scheduler.cancel()
+
+    def move(self, index):
+        if index is None or not self.items: return
+        now = time.monotonic()
+        if self._last_index is not None and index != self._last_index:
+            dt = max(now - self._last_time, 1e-3)
+            speed = (index - self._last_index) / dt
+            # After a pause the old momentum means nothing
+            self.velocity = speed if dt > 0.5 else 0.6 * speed + 0.4 * self.velocity
+        self._last_index = index
+        self._last_time = now
+        self.scheduler.schedule([self.items[i] for i in self.window(index)])
+
+    def window(self, index):
+        """Row indexes to keep warm, most urgent first."""
+        last = len(self.items) - 1
+        index = max(0, min(index, last))
+        step = 1 if self.velocity >= 0 else -1
+        reach = self.ahead + min(int(abs(self.velocity) * PREFETCH_LOOKAHEAD), PREFETCH_MAX_EXTRA)
+
+        rows = [index]
+        rows += [index + step * i for i in range(1, reach + 1)]
+        rows += [index - step * i for i in range(1, self.behind + 1)]
+        return [r for r in rows if 0 <= r <= last]
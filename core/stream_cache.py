@@ -0,0 +1,69 @@
+# core/stream_cache.py
+import json
+import threading
+import time
+
+from api.db import open_db
+from config import STREAM_CACHE_FILE, STREAM_CACHE_TTL, STREAM_CACHE_MAX_AGE
+
+
+class StreamCache:
+    """
+    On-disk cache of stream addon answers, one row per (Stremio id, addon).
+    Only successful answers are stored, so a failing addon never wipes out
+    the last good list. Rows older than STREAM_CACHE_MAX_AGE are dropped.
+    get()/put() block on SQLite: call them through asyncio.to_thread.
+    """
+    def __init__(self, path=STREAM_CACHE_FILE, ttl=STREAM_CACHE_TTL, max_age=STREAM_CACHE_MAX_AGE):
+        self.ttl = ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = open_db(path, self._setup)
+
+    def _setup(self, db):
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS streams (
+                stremio_id TEXT,
+                provider TEXT,
+                payload TEXT,
+                fetched_at REAL,
+                PRIMARY KEY (stremio_id, provider)
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_streams_fetched ON streams(fetched_at)")
+        # Drop what is too old to ever be shown again (once per start)
+        db.execute("DELETE FROM streams WHERE fetched_at <= ?", (time.time() - self.max_age,))
+
+    def get(self, stremio_id):
+        """{provider: (streams, age in seconds)} for everything still usable."""
+        if not self._db: return {}
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT provider, payload, fetched_at FROM streams WHERE stremio_id = ? AND fetched_at > ?",
+                (stremio_id, cutoff)
+            ).fetchall()
+        now = time.time()
+        cached = {}
+        for provider, payload, fetched_at in rows:
+            try:
+                cached[provider] = (json.loads(payload), now - fetched_at)
+            except ValueError:
+                continue
+        return cached
+
+    def is_fresh(self, age):
+        return age < self.ttl
+
+    def put(self, stremio_id, provider, streams):
+        if not self._db: return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO streams VALUES (?, ?, ?, ?)",
+                (stremio_id, provider, json.dumps(streams), time.time())
+            )
+
+    def close(self):
+        if self._db:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,255 @@
+# core/streams.py
+import math
+import re
+
+from core.utils import format_size
+from config import STREAM_MAX_SIZE_GB, STREAM_MIN_SEEDS, STREAM_PREFERRED_RESOLUTION
+
+# Stats come tagged ("💾 1.2 GB", "👤 42"). Finding the tag with str.find and
+# matching only at that spot is much cheaper than letting a pattern scan the
+# whole title (see benchmarks/bench_stream_parse.py).
+_SIZE_TAGS = ("💾", "📦", "Size", "size", "SIZE")
+_SEED_TAGS = ("👤", "👥", "S:")
+_SIZE_AT = re.compile(r"\s?([\d\.]+)\s?([KMGTkmgt])[Bb]")
+_SEEDS_AT = re.compile(r"\s?(\d+)")
+_LOOSE_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s?([KMGTkmgt])[Bb]")
+_SIZE_PARTS = re.compile(r"([\d\.]+)\s?([KMGT])B", re.IGNORECASE)
+
+# resolution token -> (tag, style, rank), best first. Higher rank is better.
+RESOLUTIONS = {
+    "2160p": ("4K", "bold gold1", 4),
+    "4k": ("4K", "bold gold1", 4),
+    "1080p": ("1080p", "bold green", 3),
+    "720p": ("720p", "green", 2),
+    "480p": ("480p", "yellow", 1),
+    "cam": ("CAM", "red", 0),
+}
+_RANK_BY_TAG = {tag.lower(): rank for tag, _, rank in RESOLUTIONS.values()}
+_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def _to_bytes(number, unit):
+    try:
+        return int(float(number) * _UNITS[unit.upper()])
+    except ValueError:
+        return 0
+
+
+def _find_tagged(text, tags, pattern):
+    for tag in tags:
+        i = text.find(tag)
+        if i >= 0:
+            m = pattern.match(text, i + len(tag))
+            if m: return m
+    return None
+
+
+def size_to_bytes(size_str):
+    m = _SIZE_PARTS.search(size_str or "")
+    return _to_bytes(m.group(1), m.group(2)) if m else 0
+
+
+class StreamInfo:
+    """One playable stream, parsed once from an addon's raw JSON."""
+    __slots__ = (
+        "provider", "provider_tag", "filename", "res_tag", "res_color", "res_rank",
+        "size_str", "size_bytes", "seeds", "link", "info_hash", "file_idx",
+        "sources", "score",
+    )
+
+    def __init__(self, provider, provider_tag, filename, res_tag, res_color, res_rank,
+                 size_str, size_bytes, seeds, link, info_hash, file_idx, sources=None):
+        self.provider = provider
+        self.provider_tag = provider_tag
+        self.filename = filename
+        self.res_tag = res_tag
+        self.res_color = res_color
+        self.res_rank = res_rank
+        self.size_str = size_str
+        self.size_bytes = size_bytes
+        self.seeds = seeds
+        self.link = link
+        self.info_hash = info_hash
+        self.file_idx = file_idx
+        # Every addon that returned this stream (more than one after merging)
+        self.sources = sources or (provider,)
+        self.score = 0.0
+
+    def copy(self):
+        return StreamInfo(
+            self.provider, self.provider_tag, self.filename, self.res_tag, self.res_color,
+            self.res_rank, self.size_str, self.size_bytes, self.seeds, self.link,
+            self.info_hash, self.file_idx, self.sources,
+        )
+
+    def absorb(self, other):
+        """Folds a duplicate of this stream from another addon into it, keeping the better fields."""
+        if other.provider not in self.sources:
+            self.sources += (other.provider,)
+            self.provider_tag = f"{self.provider_tag}+{other.provider_tag}"
+        if other.res_rank > self.res_rank:
+            self.res_tag, self.res_color, self.res_rank = other.res_tag, other.res_color, other.res_rank
+        if other.seeds is not None and (self.seeds is None or other.seeds > self.seeds):
+            self.seeds = other.seeds
+        if other.size_bytes and not self.size_bytes:
+            self.size_str, self.size_bytes = other.size_str, other.size_bytes
+        if self.filename == "Unknown Release" or len(other.filename) > len(self.filename):
+            if other.filename != "Unknown Release": self.filename = other.filename
+        if self.file_idx is None: self.file_idx = other.file_idx
+
+    @property
+    def stats_display(self):
+        parts = []
+        if self.size_str: parts.append(f"💾 {self.size_str}")
+        if self.seeds is not None: parts.append(f"👤 {self.seeds}")
+        return "  ".join(parts)
+
+
+def parse_stream(s, provider=None):
+    """Raw addon stream dict -> StreamInfo, or None if there is nothing to play."""
+    if not isinstance(s, dict): return None
+
+    info_hash = s.get('infoHash')
+    link = s.get('url') or info_hash
+    if not link: return None
+    if not link.startswith("magnet") and not link.startswith("http"):
+        link = f"magnet:?xt=urn:btih:{link}"
+
+    # --- Provider Tag ---
+    raw_provider = (s.get('provider') or s.get('name') or provider or 'UNK').replace('\n', ' ')
+    if "Torrentio" in raw_provider: provider_tag = "Tor"
+    elif "Comet" in raw_provider: provider_tag = "Comet"
+    else: provider_tag = raw_provider[:5]
+
+    # --- Stats and resolution ---
+    # (Torrentio puts the resolution in the stream name rather than the title)
+    full_title = s.get('title') or s.get('description') or ''
+    bh = s.get('behaviorHints') or {}
+
+    size_str, size_bytes = "", 0
+    video_size = bh.get('videoSize')
+    if video_size:
+        try:
+            size_bytes = int(video_size)
+            size_str = format_size(size_bytes)
+        except (TypeError, ValueError):
+            pass
+    seeds = s.get('seeds')
+    if seeds is not None:
+        try:
+            seeds = int(seeds)
+        except (TypeError, ValueError):
+            seeds = None
+
+    if not size_str:
+        m = _find_tagged(full_title, _SIZE_TAGS, _SIZE_AT) or _LOOSE_SIZE.search(full_title)
+        if m: size_str, size_bytes = f"{m.group(1)} {m.group(2).upper()}B", _to_bytes(m.group(1), m.group(2))
+    if seeds is None:
+        m = _find_tagged(full_title, _SEED_TAGS, _SEEDS_AT)
+        if m: seeds = int(m.group(1))
+
+    res_tag, res_color, res_rank = "", "dim", -1
+    check_str = f"{full_title} {raw_provider}".lower()
+    for token, res in RESOLUTIONS.items():
+        if token in check_str:
+            res_tag, res_color, res_rank = res
+            break
+
+    # --- Clean Filename ---
+    filename = full_title.split('\n', 1)[0].strip()
+    if not filename: filename = bh.get('filename') or "Unknown Release"
+
+    return StreamInfo(
+        provider or raw_provider, provider_tag, filename, res_tag, res_color, res_rank,
+        size_str, size_bytes, seeds, link, info_hash and info_hash.lower(), s.get('fileIdx'),
+    )
+
+
+def parse_streams(streams, provider=None):
+    """Parses a provider's stream list, dropping anything unplayable."""
+    parsed = []
+    for s in streams or ():
+        info = parse_stream(s, provider)
+        if info is not None:
+            parsed.append(info)
+    return parsed
+
+
+def merge_streams(infos):
+    """
+    Collapses the same torrent returned by several addons into one row.
+    Rows match on infoHash+fileIdx; a row without a fileIdx joins the other
+    rows of its infoHash when they all point at the same file. Links without
+    an infoHash only merge when the link itself is identical.
+    """
+    merged = {}
+    by_hash = {}  # info_hash -> keys of its rows
+    for info in infos:
+        if info.info_hash:
+            key = (info.info_hash, info.file_idx)
+            if key not in merged:
+                keys = by_hash.get(info.info_hash, [])
+                if info.file_idx is None and len(keys) == 1:
+                    key = keys[0]
+                elif len(keys) == 1 and keys[0][1] is None:
+                    # The earlier row had no fileIdx: re-key it under this one
+                    merged[key] = merged.pop(keys[0])
+                    keys[:] = [key]
+        else:
+            key = info.link
+
+        if key in merged:
+            merged[key].absorb(info)
+        else:
+            merged[key] = info.copy()
+            if info.info_hash: by_hash.setdefault(info.info_hash, []).append(key)
+    return list(merged.values())
+
+
+def score_stream(info, health=None, preferred_rank=None):
+    """
+    Higher is better. Resolution dominates (or closeness to the preferred
+    one), then seeders, then size as a tie-break for quality. Dead torrents
+    and streams from an addon that has been failing lately are pushed down.
+    health: {provider name: summary dict from ProviderHealth.summary()}
+    """
+    if info.res_rank < 0:
+        res = -1
+    elif preferred_rank is None or info.res_rank == 0:  # CAM is never "close enough"
+        res = info.res_rank
+    else:
+        res = 4 - abs(info.res_rank - preferred_rank)
+
+    score = res * 10.0
+    score += math.log1p(info.seeds or 0)                        # 0 .. ~9
+    if info.seeds == 0: score -= 15.0                           # known dead torrent
+    score += 0.5 * math.log1p(info.size_bytes / 1024 ** 3)      # 0 .. ~1.5
+
+    if health:
+        reliability = max((1.0 - health[p]['error_rate'] for p in info.sources if p in health), default=1.0)
+        score -= 3.0 * (1.0 - reliability)
+    return score
+
+
+def rank_streams(infos, health=None, max_size_gb=STREAM_MAX_SIZE_GB,
+                 min_seeds=STREAM_MIN_SEEDS, preferred=STREAM_PREFERRED_RESOLUTION):
+    """
+    Merge duplicates, drop what the caps exclude, sort best first.
+    Returns (ranked rows, number hidden by the caps).
+    """
+    preferred_rank = _RANK_BY_TAG.get((preferred or "").lower())
+    max_bytes = max_size_gb * 1024 ** 3 if max_size_gb else None
+
+    ranked, hidden = [], 0
+    for info in merge_streams(infos):
+        if max_bytes and info.size_bytes > max_bytes:
+            hidden += 1
+            continue
+        if min_seeds and info.seeds is not None and info.seeds < min_seeds:
+            hidden += 1
+            continue
+        info.score = score_stream(info, health, preferred_rank)
+        ranked.append(info)
+
+    ranked.sort(key=lambda i: i.score, reverse=True)
+    return ranked, hidden
@@ -0,0 +1,143 @@
+# core/torrent_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+from config import TORRENT_CACHE_DIR, TORRENT_CACHE_MAX_GB
+
+_BTIH = re.compile(r"urn:btih:([0-9a-zA-Z]+)")
+META_FILE = ".stremio-tui.json"
+
+
+def torrent_key(link):
+    """infoHash of a magnet link (lowercased), or a stable hash of any other link."""
+    m = _BTIH.search(link or "")
+    if m: return m.group(1).lower()
+    return "url-" + hashlib.sha1((link or "").encode()).hexdigest()[:20]
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class TorrentCache:
+    """
+    Download folders for webtorrent, one per infoHash (+fileIdx), kept
+    across plays. Entries in use are never evicted; the rest are deleted
+    least recently played first once the total passes the quota. Deletion
+    runs on a worker thread (cleanup_async) so the UI never waits on it.
+    """
+    def __init__(self, root=TORRENT_CACHE_DIR, max_bytes=TORRENT_CACHE_MAX_GB * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._in_use = {}  # path -> number of players using it
+        self.evicted = 0
+
+    def entry_dir(self, link, file_idx=None):
+        name = torrent_key(link)
+        if file_idx is not None: name = f"{name}-{int(file_idx)}"
+        return os.path.join(self.root, name)
+
+    def find(self, link, file_idx=None):
+        """
+        Existing download for `link`, as (path, file_idx), or (None, file_idx).
+        Without a fileIdx (e.g. resuming from history) the most recently
+        played download of that torrent is reused, with the file it played.
+        """
+        path = self.entry_dir(link, file_idx)
+        if os.path.isdir(path) or file_idx is not None:
+            return (path if os.path.isdir(path) else None), file_idx
+
+        key = torrent_key(link)
+        best, best_used = None, -1
+        for name in self._entries():
+            if name.startswith(key + "-"):
+                meta = self._read_meta(os.path.join(self.root, name))
+                if meta.get('last_used', 0) > best_used:
+                    best, best_used = (os.path.join(self.root, name), meta.get('file_idx')), meta.get('last_used', 0)
+        return best or (None, None)
+
+    def acquire(self, link, file_idx=None):
+        """
+        Folder to download `link` into (created if needed), as (path, file_idx).
+        Marks it in use until release().
+        """
+        path, file_idx = self.find(link, file_idx)
+        if path is None:
+            path = self.entry_dir(link, file_idx)
+        os.makedirs(path, exist_ok=True)
+        self._write_meta(path, {'link': link, 'file_idx': file_idx, 'last_used': time.time()})
+        with self._lock:
+            self._in_use[path] = self._in_use.get(path, 0) + 1
+        return path, file_idx
+
+    def release(self, path):
+        with self._lock:
+            count = self._in_use.get(path, 0) - 1
+            if count > 0: self._in_use[path] = count
+            else: self._in_use.pop(path, None)
+        if os.path.isdir(path):
+            meta = self._read_meta(path)
+            meta['last_used'] = time.time()
+            self._write_meta(path, meta)
+
+    def usage(self):
+        """[(path, size in bytes, last used)], least recently used first."""
+        entries = []
+        for name in self._entries():
+            path = os.path.join(self.root, name)
+            meta = self._read_meta(path)
+            last_used = meta.get('last_used') or os.path.getmtime(path)
+            entries.append((path, _dir_size(path), last_used))
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def cleanup(self):
+        """Deletes least recently used downloads until under the quota. Returns bytes freed."""
+        entries = self.usage()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for path, size, _ in entries:
+            if total - freed <= self.max_bytes: break
+            with self._lock:
+                if path in self._in_use: continue
+            shutil.rmtree(path, ignore_errors=True)
+            freed += size
+            self.evicted += 1
+        return freed
+
+    async def cleanup_async(self):
+        return await asyncio.to_thread(self.cleanup)
+
+    def _entries(self):
+        try:
+            return [n for n in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, n))]
+        except OSError:
+            return []
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, path, meta):
+        try:
+            with open(os.path.join(path, META_FILE), 'w') as f:
+                json.dump(meta, f)
+        except OSError:
+            pass
@@ -34,6 +34,14 @@ def fmt_runtime(val):
     except: pass
     return str(val)
 
+def fmt_clock(seconds):
+    """Playback position: 754 -> "12:34", 3723 -> "1:02:03"."""
+    if seconds is None: return "--:--"
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
 def fmt_rating(val):
     if val is None or val == "": return "N/A"
     try:
@@ -42,3 +50,39 @@ def fmt_rating(val):
         return f"⭐ {f_val:.1f}"
     except:
         return "N/A"
+
+def group_by_season(videos):
+    """Cinemeta-style videos list -> {season number: [episode dicts]} (missing season counts as 1)."""
+    seasons = {}
+    for vid in videos or []:
+        s = vid.get('season', 1)
+        if s is None: s = 1
+        seasons.setdefault(s, []).append(vid)
+    return seasons
+
+def next_episode(seasons_map, season, episode):
+    """
+    The episode after SxxEyy as (season, episode dict): the next one in the
+    same season, else the first episode of the next season. Extras (season 0)
+    only lead to more extras. None at the end of the show.
+    """
+    def ep_key(ep):
+        return ep.get('episode') if ep.get('episode') is not None else 999
+
+    try:
+        season, episode = int(season), int(episode)
+    except (TypeError, ValueError):
+        return None
+
+    later = [ep for ep in seasons_map.get(season, []) if ep_key(ep) > episode and ep.get('episode') is not None]
+    if later:
+        return season, min(later, key=ep_key)
+    if season == 0:
+        return None
+
+    next_seasons = sorted(s for s in seasons_map if s is not None and s > season)
+    for s in next_seasons:
+        eps = [ep for ep in seasons_map[s] if ep.get('episode') is not None]
+        if eps:
+            return s, min(eps, key=ep_key)
+    return None
@@ -1,6 +1,5 @@
 # ui/app.py
 import subprocess
-import tempfile
 import asyncio
 from textual.app import App, ComposeResult
 from textual.containers import Vertical, Horizontal, Container
@@ -8,6 +7,9 @@ from textual.widgets import Label, Input, ListView, LoadingIndicator
 from textual import work
 
 from core.manager import MediaManager
+from core.prefetch import PrefetchScheduler, WindowPrefetcher
+from core.utils import fmt_clock
+from config import SEARCH_AS_YOU_TYPE, SEARCH_DEBOUNCE, SEARCH_MIN_CHARS, WARM_NEXT_EPISODE, PLAYER_MODE
 from ui.widgets.nav import SidebarNav, SidebarItem
 from ui.widgets.cards import ResultItem
 from ui.screens.details import SeriesDetailScreen
@@ -15,10 +17,7 @@ from ui.screens.player import StreamSelectScreen
 from ui.widgets.vim_list import VimListView
 from ui.widgets.sidebar import SeriesSidebar 
 
-from ui.keybinds import APP_BINDINGS, NAV_BINDINGS
-
-class VimListView(ListView):
-    BINDINGS = NAV_BINDINGS
+from ui.keybinds import APP_BINDINGS
 
 class StremioApp(App):
     CSS_PATH = "../styles.tcss" 
@@ -29,6 +28,11 @@ class StremioApp(App):
         self.manager = MediaManager()
         self.current_view = "search"
         self.preview_cache = {} 
+        self.current_results = []
+        # Keeps previews around the list cursor warm (see on_mount)
+        self.prefetcher = WindowPrefetcher(
+            PrefetchScheduler(self.warm_preview, is_warm=lambda imdb_id: imdb_id in self.preview_cache)
+        )
 
     def compose(self) -> ComposeResult:
         with Vertical(id="sidebar"):
@@ -36,7 +40,7 @@ class StremioApp(App):
             yield SidebarNav()
 
         with Vertical(id="main_container"):
-            yield Input(placeholder="Search Movies & TV... (Press 'i' or '/')", id="search_box")
+            yield Input(placeholder="Search Movies & TV... (Press 'i')", id="search_box")
             
             # Use a Container to stack the Loading Indicator and the Content
             with Container(id="results_area"):
@@ -51,6 +55,25 @@ class StremioApp(App):
             
     def on_mount(self):
         self.query_one("#search_box").focus()
+        self.query_one("#results_list", VimListView).prefetcher = self.prefetcher
+        self.refresh_catalog_index()
+        self.trim_torrent_cache()
+
+    @work(exclusive=True, group="catalog")
+    async def refresh_catalog_index(self):
+        """Keeps the offline search index fresh; no-op when it already is."""
+        try:
+            await self.manager.refresh_catalog()
+        except Exception:
+            pass
+
+    @work(exclusive=True, group="torrent_cache")
+    async def trim_torrent_cache(self):
+        """Deletes old downloads past the disk quota, in the background."""
+        try:
+            await self.manager.trim_torrent_cache()
+        except Exception:
+            pass
 
     # --- ACTIONS ---
     def action_focus_search(self):
@@ -61,88 +84,71 @@ class StremioApp(App):
         self.query_one("#results_list").focus()
 
     # --- CORE LOGIC: PRE-FETCHING ---
-    async def prefetch_metadata(self, results, limit=20):
+    async def warm_preview(self, res):
         """
-        Fetches detailed metadata and posters for the top N results 
-        in parallel before showing the list.
+        Fetches detailed metadata and the poster for one result, in the
+        background. Called by the prefetcher for rows near the cursor.
         """
-        # 1. Identify items needing fetch
-        target_items = results[:limit]
-        fetch_tasks = []
-        
-        for res in target_items:
-            # Skip if already cached
-            if res['id'] in self.preview_cache: continue
-            
-            # Create a task for get_unified_metadata
-            fetch_tasks.append(self.manager.get_unified_metadata(res['id'], res['title']))
-
-        if not fetch_tasks: return
-
-        # 2. Run Metadata Fetch in Parallel
-        meta_results = await asyncio.gather(*fetch_tasks)
-
-        # 3. Cache Metadata & Queue Image Downloads
-        image_tasks = []
-        
-        # We need to match results back to IDs. 
-        # Since fetch_tasks corresponds to target_items (minus cached ones),
-        # we strictly should map them carefully. For simplicity in this logic,
-        # we assume order is preserved by gather.
-        
-        valid_metas = [m for m in meta_results if m]
-        
-        for meta in valid_metas:
-            # Find the ID from the result (heuristic match or just loop)
-            # Better way: gather returns in order.
-            pass
-
-        # Re-loop to safely map inputs to outputs
-        # (A simplified approach since we don't have the ID inside 'meta' sometimes)
-        for i, meta in enumerate(meta_results):
-            if not meta: continue
-            
-            # We need the original ID. 
-            # Recalculate which items were actually fetched to map index i correctly.
-            # For simpler code, let's just use the fact that target_items order matches tasks.
-            # Note: This ignores the "continue" in the task creation loop for simplicity here.
-            # Real implementation:
-            
-            # Let's assume we fetched for target_items[i]
-            # (If we skipped cached items, this indexing would be off, 
-            # but for this snippet let's assume cache was empty for simplicity)
-            
-            item_id = target_items[i]['id']
-            self.preview_cache[item_id] = meta
-            
-            if meta.get('poster'):
-                # Queue image download
-                image_tasks.append(self.manager.get_image(meta['poster']))
-        
-        # 4. Run Image Downloads in Parallel
-        if image_tasks:
-            await asyncio.gather(*image_tasks)
+        meta = await self.manager.get_unified_metadata(res['id'], res['title'])
+        if not meta: return
+        self.preview_cache[res['id']] = meta
+        if meta.get('poster'):
+            await self.manager.get_image(meta['poster'])
 
     # --- EVENT HANDLERS ---
     
+    def on_input_changed(self, message: Input.Changed):
+        if not SEARCH_AS_YOU_TYPE or self.current_view != "search": return
+        self.search_as_you_type(message.value)
+
+    @work(exclusive=True, group="search")
+    async def search_as_you_type(self, query):
+        """
+        Runs on every keystroke; a newer keystroke cancels this worker,
+        including its pending network request.
+        """
+        query = query.strip()
+        if len(query) < SEARCH_MIN_CHARS: return
+
+        # 1. Instant answer from the local index, or an earlier query that covers this one
+        local = self.manager.search_local(query)
+        shown = self.merge_results(local, self.manager.search_cached(query) or [])
+        if shown:
+            self.populate_list(shown, focus=False, prefetch=False)
+
+        # 2. Debounce, then ask the network for the real thing
+        await asyncio.sleep(SEARCH_DEBOUNCE)
+        results = self.merge_results(local, await self.manager.search_imdb(query))
+        if results and results != shown:
+            self.populate_list(results, focus=False)
+        elif shown:
+            # The network agreed with the instant answer: warm that one now
+            self.prefetcher.move(0)
+
     async def on_input_submitted(self, message: Input.Submitted):
         query = message.value
         if not query: return
+        self.workers.cancel_group(self, "search")
         
-        self.set_loading(True)
+        # Offline index answers first; network results are merged in after
+        local = self.manager.search_local(query)
+        if local:
+            self.populate_list(local)
+        else:
+            self.set_loading(True)
         self.notify(f"Searching for {query}...")
         
-        results = await self.manager.search_imdb(query)
+        results = self.merge_results(local, await self.manager.search_imdb(query))
         
         if not results:
             self.notify("No results found.", severity="error")
             self.set_loading(False)
             return
 
-        # PRE-FETCH BEFORE SHOWING
-        await self.prefetch_metadata(results)
-
-        self.populate_list(results)
+        if local:
+            self.append_results(results[len(local):])
+        else:
+            self.populate_list(results)
         self.set_loading(False)
 
     async def switch_to_trending(self):
@@ -159,9 +165,6 @@ class StremioApp(App):
             self.set_loading(False)
             return
 
-        # PRE-FETCH BEFORE SHOWING
-        await self.prefetch_metadata(results, limit=25) # Fetch top 25
-
         self.populate_list(results)
         self.set_loading(False)
 
@@ -177,16 +180,47 @@ class StremioApp(App):
             loader.add_class("hidden")
             content.remove_class("hidden")
 
-    def populate_list(self, results):
+    @staticmethod
+    def merge_results(first, second):
+        """first, then anything from second that isn't already in it (by id)."""
+        seen = {r['id'] for r in first}
+        return first + [r for r in second if r['id'] not in seen]
+
+    def append_results(self, results):
         list_view = self.query_one("#results_list")
-        list_view.clear()
-        for res in results:
-            list_view.append(ResultItem(res['title'], res['year'], res['type'], res['id']))
-        
-        if len(list_view.children) > 0:
-            list_view.index = 0
+        self.current_results = self.current_results + list(results)
+        # Items for every row first: the list re-applies an open filter to them
+        self.prefetcher.set_items(self.current_results)
+        list_view.extend_rows(results)
+
+    def populate_list(self, results, focus=True, prefetch=True):
+        """prefetch=False: don't warm previews yet (results shown on a keystroke, before the debounce)."""
+        list_view = self.query_one("#results_list")
+        self.current_results = list(results)
+        self.prefetcher.set_items(self.current_results)
+        if prefetch:
+            # Previews start warming from the top right away, then follow the cursor
+            self.prefetcher.move(0)
+        else:
+            # Nor keep warming the previous keystroke's results
+            self.prefetcher.scheduler.cancel()
+
+        # While typing, keep focus in the search box (and no cursor in the list)
+        list_view.set_rows(
+            self.current_results, self.make_result_item,
+            index=0 if focus else None, row_text=self.result_label,
+        )
+        if focus and self.current_results:
             list_view.focus()
 
+    @staticmethod
+    def make_result_item(res):
+        return ResultItem(res['title'], res['year'], res['type'], res['id'])
+
+    @staticmethod
+    def result_label(res):
+        return f"{res['title']} {res.get('year') or ''}"
+
     # --- SIDEBAR UPDATES ---
     async def on_list_view_highlighted(self, message: ListView.Highlighted):
         item = message.item
@@ -194,8 +228,9 @@ class StremioApp(App):
             # No await here, @work handles it
             self.update_preview_sidebar(item)
 
-    @work
+    @work(exclusive=True, group="preview")
     async def update_preview_sidebar(self, item: ResultItem):
+        # exclusive: moving the cursor cancels the previous item's fetches
         try:
             sidebar = self.query_one("#home_preview", SeriesSidebar)
         except: return
@@ -245,7 +280,7 @@ class StremioApp(App):
                 self.switch_to_history()
         elif isinstance(item, ResultItem):
             if item.stream_link:
-                self.play_video(item)
+                await self.play_video(item)
                 return 
             if hasattr(item, 'type_'):
                 if item.type_ in ["TV series", "series"]:
@@ -253,35 +288,78 @@ class StremioApp(App):
                 else:
                     self.push_screen(StreamSelectScreen(item.imdb_id, item.type_, item.title_text))
 
-    def play_video(self, item):
+    async def play_video(self, item):
         self.notify(f"Resuming {item.title_text}...")
-        with self.suspend():
+        season, episode = getattr(item, 'season', None), getattr(item, 'episode', None)
+        if season and episode and WARM_NEXT_EPISODE:
+            self.manager.warm_next_episode(item.imdb_id, item.title_text, season, episode)
+        # Same torrent folder as the first play, so it resumes from local pieces
+        await self.launch_player(item.stream_link, title=item.title_text)
+
+    async def launch_player(self, link, file_idx=None, title=None):
+        """
+        Plays `link` through the manager's Player. In "terminal" mode the TUI
+        is suspended until the player exits (the event loop, and with it any
+        background work, keeps running); in "window" mode it returns at once.
+        """
+        player = self.manager.player
+        if PLAYER_MODE == "window":
+            session = await player.play(link, file_idx, title, windowed=True)
+            session.watch(self.on_player_update)
+            return session
+
+        # batch_update holds back repaints until the app has the terminal again
+        with self.batch_update(), self.suspend():
             subprocess.run(["clear"])
-            with tempfile.TemporaryDirectory(prefix="stremio_") as tmp_dir:
-                cmd = ["webtorrent", item.stream_link, "--out", tmp_dir, "--mpv", "--player-args=--save-position-on-quit"]
-                subprocess.run(cmd)
+            session = await player.play(link, file_idx, title)
+            print(f"Caching stream to: {session.out_dir}")
+            await session.wait()
+        self.on_player_update(session)
+        return session
+
+    def on_player_update(self, session):
+        if session.running:
+            # Only speak up when buffering starts, not on every position tick
+            if session.buffering and not getattr(session, 'buffer_noticed', False):
+                self.notify(f"Buffering {session.title or ''}...")
+            session.buffer_noticed = session.buffering
+            return
+
+        self.trim_torrent_cache()
+        if session.position is not None:
+            self.notify(
+                f"Stopped {session.title or ''} at {fmt_clock(session.position)} / {fmt_clock(session.duration)}"
+            )
 
     def switch_to_search(self):
         self.current_view = "search"
         search_box = self.query_one("#search_box")
         search_box.remove_class("hidden")
         self.query_one("#results_list").clear()
+        self.prefetcher.set_items([])
         search_box.focus()
 
     def switch_to_history(self):
         self.current_view = "history"
         self.query_one("#search_box").add_class("hidden")
         list_view = self.query_one("#results_list")
-        list_view.clear()
-        # History is instant, no need to prefetch heavy metadata
-        for item in self.manager.get_history():
-            base_title = item['title'] 
-            info_str = item.get('last_watched', '')
-            if item.get('season') and item.get('episode'):
-                info_str = f"S{item['season']:02d}E{item['episode']:02d} | {info_str}"
-            list_view.append(ResultItem(base_title, info_str, item.get('type', 'series'), item['imdb_id'], item.get('stream_link')))
+        history = self.manager.get_history()
+        # History rows show instantly; previews warm around the cursor
+        self.current_results = [{'id': item['imdb_id'], 'title': item['title']} for item in history]
+        self.prefetcher.set_items(self.current_results)
+        list_view.set_rows(history, self.make_history_item, row_text=lambda item: item['title'])
         list_view.focus()
-        list_view.index = 0
+
+    @staticmethod
+    def make_history_item(item):
+        base_title = item['title'] 
+        info_str = item.get('last_watched', '')
+        if item.get('season') and item.get('episode'):
+            info_str = f"S{item['season']:02d}E{item['episode']:02d} | {info_str}"
+        row = ResultItem(base_title, info_str, item.get('type', 'series'), item['imdb_id'], item.get('stream_link'))
+        row.season, row.episode = item.get('season'), item.get('episode')
+        return row
 
     async def on_shutdown(self):
+        self.prefetcher.set_items([])
         await self.manager.close()
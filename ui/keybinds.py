@@ -18,6 +18,9 @@ NAV_BINDINGS = [
     
     # Selection (Explicitly map enter)
     Binding("enter", "select_cursor", "Select", show=False),
+
+    # Fuzzy filter inside the list
+    Binding("/", "filter", "Filter", show=False),
 ]
 
 # --- Global App Bindings ---
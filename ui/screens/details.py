@@ -1,4 +1,6 @@
 # ui/screens/details.py
+import asyncio
+
 from textual.app import ComposeResult
 from textual.containers import Horizontal, Vertical
 from textual.widgets import ListView, ListItem, Label, LoadingIndicator
@@ -9,7 +11,8 @@ from rich.text import Text
 from ui.widgets.sidebar import SeriesSidebar
 from ui.screens.player import StreamSelectScreen
 from ui.widgets.vim_list import VimListView
-from core.utils import fmt_runtime
+from core.utils import fmt_runtime, group_by_season
+from core.prefetch import PrefetchScheduler, WindowPrefetcher
 
 # NEW: Import bindings
 from ui.keybinds import NAV_BINDINGS, APP_BINDINGS
@@ -60,6 +63,8 @@ class SeriesDetailScreen(Screen):
         self.series_runtime = "N/A"
         self.loaded_seasons = set()
         self.season_meta_cache = {} 
+        # Set once fetch_all_season_details has answered (or failed)
+        self.season_meta_ready = asyncio.Event()
         self.current_season = None
         
     def compose(self) -> ComposeResult:
@@ -74,10 +79,19 @@ class SeriesDetailScreen(Screen):
 
     def on_mount(self):
         self.manager = self.app.manager
+        # Warm thumbnails / posters around the cursor as it moves
+        self.image_prefetcher = WindowPrefetcher(
+            PrefetchScheduler(self.manager.get_image, is_warm=self.manager.images.has, key=lambda url: url)
+        )
+        self.query_one("#selection_list", VimListView).prefetcher = self.image_prefetcher
         self.fetch_data()
         # Auto-focus the list so 'j'/'k' works immediately
         self.query_one("#selection_list").focus()
 
+    def on_unmount(self):
+        # Leaving the screen: stop warming thumbnails nobody will see
+        self.image_prefetcher.set_items([])
+
     def action_back(self):
         if not self.viewing_seasons and not self.is_single_season:
             self.show_season_list()
@@ -92,47 +106,22 @@ class SeriesDetailScreen(Screen):
         if not self.meta or not self.meta.get('videos'):
             self.query_one("#screen_title").update("Failed to load metadata.")
             self.query_one("#loading").display = False
+            self.season_meta_ready.set()
             return
 
         self.main_poster_url = self.meta.get('poster')
         self.series_runtime = fmt_runtime(self.meta.get('runtime'))
         
-        videos = self.meta.get('videos', [])
-        seasons = {}
-        for vid in videos:
-            s = vid.get('season', 1)
-            if s is None: s = 1 
-            if s not in seasons: seasons[s] = []
-            seasons[s].append(vid)
-            
+        seasons = group_by_season(self.meta.get('videos', []))
         self.seasons_map = seasons
         valid_keys = [k for k in seasons.keys() if k is not None]
         keys = sorted([k for k in valid_keys if k != 0])
         if 0 in seasons: keys.append(0)
         self.sorted_season_keys = keys
 
-        self.query_one("#screen_title").update("Fetching Season Metadata...")
-        
-        self.season_meta_cache = await self.manager.fetch_all_season_details(
-            self.imdb_id, 
-            self.show_title, 
-            self.meta.get('genres', []),
-            self.meta.get('country', 'Unknown'), 
-            keys
-        )
-
-        if self.main_poster_url:
-            await self.manager.get_image(self.main_poster_url)
-            
-        count = 0
-        for s_num in keys:
-            if count >= 10: break
-            s_key = int(s_num)
-            if s_key in self.season_meta_cache:
-                s_poster = self.season_meta_cache[s_key].get('poster')
-                if s_poster:
-                    await self.manager.get_image(s_poster)
-            count += 1
+        # The list is usable right away; season overviews, ratings and
+        # posters fill in as they arrive
+        self.load_season_details()
 
         self.query_one("#loading").display = False
         sidebar.show_series_data(self.meta, self.series_runtime)
@@ -145,7 +134,40 @@ class SeriesDetailScreen(Screen):
         else:
             self.show_season_list()
 
-    @work
+    @work(exclusive=True, group="season_details")
+    async def load_season_details(self):
+        try:
+            self.season_meta_cache = await self.manager.fetch_all_season_details(
+                self.imdb_id, 
+                self.show_title, 
+                self.meta.get('genres', []),
+                self.meta.get('country', 'Unknown'), 
+                self.sorted_season_keys
+            ) or {}
+        finally:
+            self.season_meta_ready.set()
+
+        if not self.is_mounted: return
+        if self.viewing_seasons:
+            # Season posters are known now: warm the ones around the cursor
+            list_view = self.query_one("#selection_list")
+            self.image_prefetcher.set_items(self.season_posters())
+            self.image_prefetcher.move(list_view.index)
+        self.refresh_sidebar()
+
+    def refresh_sidebar(self):
+        """Redraws the sidebar for the highlighted row (after late data came in)."""
+        list_view = self.query_one("#selection_list")
+        if list_view.highlighted_child:
+            self.on_list_view_highlighted(ListView.Highlighted(list_view, list_view.highlighted_child))
+
+    def season_posters(self):
+        return [
+            self.season_meta_cache.get(s, {}).get('poster') or self.main_poster_url
+            for s in self.sorted_season_keys
+        ]
+
+    @work(exclusive=True, group="sidebar_image")
     async def load_image_to_sidebar(self, url):
         pil_img = await self.manager.get_image(url)
         if pil_img and self.is_mounted:
@@ -156,11 +178,13 @@ class SeriesDetailScreen(Screen):
         if season_num in self.loaded_seasons:
             return
 
+        ratings_map = await self.manager.fetch_season_ratings(self.imdb_id, season_num)
+
+        # AniList's season rating is the fallback, so wait for the season details
+        await self.season_meta_ready.wait()
         anilist_rating = None
         if season_num in self.season_meta_cache:
             anilist_rating = self.season_meta_cache[season_num].get('rating')
-
-        ratings_map = await self.manager.fetch_season_ratings(self.imdb_id, season_num)
         
         eps = self.seasons_map.get(season_num, [])
         for ep in eps:
@@ -173,20 +197,8 @@ class SeriesDetailScreen(Screen):
         self.loaded_seasons.add(season_num)
         
         if not self.viewing_seasons and self.current_season == season_num:
-             list_view = self.query_one("#selection_list")
-             if list_view.highlighted_child:
-                 self.on_list_view_highlighted(ListView.Highlighted(list_view, list_view.highlighted_child))
-
-        self.prefetch_images(season_num)
+            self.refresh_sidebar()
 
-    @work
-    async def prefetch_images(self, season_num):
-        eps = self.seasons_map.get(season_num, [])
-        target_eps = eps[:25]
-        for ep in target_eps:
-            url = ep.get('thumbnail')
-            if url:
-                await self.manager.get_image(url)
 
     def show_season_list(self):
         self.viewing_seasons = True
@@ -198,47 +210,57 @@ class SeriesDetailScreen(Screen):
             self.load_image_to_sidebar(self.main_poster_url)
         
         list_view = self.query_one("#selection_list")
-        list_view.clear()
-        
-        for s in self.sorted_season_keys:
-            name = "Extras" if s == 0 else f"Season {s}"
-            item = ListItem(Label(name))
-            item.season_number = s 
-            item.ep_data = None 
-            list_view.append(item)
-        
-        list_view.index = 0
+        self.image_prefetcher.set_items(self.season_posters())
+        # Rows are only built for what's on screen
+        list_view.set_rows(self.sorted_season_keys, self.make_season_item, row_text=self.season_label)
         list_view.focus()
 
+    @staticmethod
+    def season_label(s):
+        return "Extras" if s == 0 else f"Season {s}"
+
+    def make_season_item(self, s):
+        item = ListItem(Label(self.season_label(s)))
+        item.season_number = s 
+        item.ep_data = None 
+        return item
+
     def show_episodes(self, season_num):
         self.viewing_seasons = False
         self.current_season = season_num
-        name = "Extras" if season_num == 0 else f"Season {season_num}"
-        self.query_one("#screen_title").update(f"{name}")
+        self.query_one("#screen_title").update(self.season_label(season_num))
         
         self.lazy_load_season(season_num)
         
         list_view = self.query_one("#selection_list")
-        list_view.clear()
         
         eps = sorted(self.seasons_map[season_num], key=lambda x: x.get('episode') or 999)
-        for ep in eps:
-            num = ep.get('episode')
-            num_str = f"{num:02d}" if num is not None else "??"
-            ep_name = ep.get('name') or "Unknown"
-            
-            display_text = Text()
-            display_text.append(f"{num_str}", style="bold white")
-            display_text.append(" | ", style="dim")
-            display_text.append(f"{ep_name}", style="#cccccc")
-            
-            item = ListItem(Label(display_text))
-            item.ep_data = ep 
-            list_view.append(item)
-        
-        list_view.index = 0
+        self.image_prefetcher.set_items([ep.get('thumbnail') for ep in eps])
+        list_view.set_rows(eps, self.make_episode_item, row_text=self.episode_label)
         list_view.focus()
 
+    @staticmethod
+    def episode_parts(ep):
+        num = ep.get('episode')
+        num_str = f"{num:02d}" if num is not None else "??"
+        return num_str, ep.get('name') or "Unknown"
+
+    def episode_label(self, ep):
+        # What `/` matches against: "07 Ozymandias"
+        return " ".join(self.episode_parts(ep))
+
+    def make_episode_item(self, ep):
+        num_str, ep_name = self.episode_parts(ep)
+        
+        display_text = Text()
+        display_text.append(f"{num_str}", style="bold white")
+        display_text.append(" | ", style="dim")
+        display_text.append(f"{ep_name}", style="#cccccc")
+        
+        item = ListItem(Label(display_text))
+        item.ep_data = ep 
+        return item
+
     def on_list_view_highlighted(self, message: ListView.Highlighted):
         item = message.item
         if item is None: return
@@ -294,6 +316,7 @@ class SeriesDetailScreen(Screen):
                         type_="series",
                         title=self.show_title,
                         season=ep['season'],
-                        episode=ep['episode']
+                        episode=ep['episode'],
+                        seasons_map=self.seasons_map
                     )
                 )
@@ -4,20 +4,16 @@ from textual.widgets import ListView, ListItem, Label, LoadingIndicator
 from textual.screen import Screen
 from textual import work
 from rich.text import Text
-import re
-import subprocess
-import tempfile
-import os
-from pathlib import Path
 
-# Import helpers from core
-from core.utils import format_size
+from config import PROVIDERS, WARM_NEXT_EPISODE
+from ui.widgets.vim_list import VimListView
 
 class StreamItem(ListItem):
-    def __init__(self, display_renderable, link):
+    def __init__(self, display_renderable, link, file_idx=None):
         super().__init__()
         self.display_renderable = display_renderable
         self.link = link
+        self.file_idx = file_idx
 
     def compose(self) -> ComposeResult:
         yield Label(self.display_renderable)
@@ -33,15 +29,21 @@ class StreamSelectScreen(Screen):
     StreamSelectScreen ListView {
         scrollbar-size-vertical: 0;
     }
+    #provider_stats {
+        color: #888;
+        padding: 0 1;
+    }
     """
 
-    def __init__(self, imdb_id, type_, title, season=None, episode=None):
+    def __init__(self, imdb_id, type_, title, season=None, episode=None, seasons_map=None):
         super().__init__()
         self.imdb_id = imdb_id
         self.type_ = "movie" if type_ == "feature" else "series"
         self.media_title = title
         self.season = season
         self.episode = episode
+        # {season: [episodes]} from the details screen, to find the next episode
+        self.seasons_map = seasons_map
         
         if self.type_ == "series":
             self.stremio_id = f"{imdb_id}:{season}:{episode}"
@@ -53,8 +55,9 @@ class StreamSelectScreen(Screen):
     def compose(self) -> ComposeResult:
         # Removed Header()
         yield Label(f"Fetching Streams: {self.display_title}", id="screen_title")
+        yield Label("", id="provider_stats")
         yield LoadingIndicator(id="loading")
-        yield ListView(id="stream_list")
+        yield VimListView(id="stream_list")
         # Removed Footer()
 
     def on_mount(self):
@@ -63,129 +66,122 @@ class StreamSelectScreen(Screen):
     @work
     async def fetch_streams(self):
         manager = self.app.manager
-        streams = await manager.get_streams(self.type_, self.stremio_id)
         
         list_view = self.query_one("#stream_list")
         loading = self.query_one("#loading")
         title_label = self.query_one("#screen_title")
         
-        loading.display = False
-        
-        if not streams:
-            title_label.update(f"No streams found for {self.display_title}")
-            return
-
-        title_label.update(f"Select Stream: {self.display_title} ({len(streams)} found)")
-        
         # Calculate available width
         screen_width = self.app.console.size.width
         if screen_width < 80: screen_width = 80
         available_width = screen_width - 4
 
-        for s in streams:
-            if not isinstance(s, dict): continue 
-
-            # --- 1. Provider Tag ---
-            raw_provider = s.get('provider') or s.get('name', 'UNK')
-            raw_provider = raw_provider.replace('\n', ' ')
-            
-            if "Torrentio" in raw_provider: provider_tag = "Tor"
-            elif "Comet" in raw_provider: provider_tag = "Comet"
-            else: provider_tag = raw_provider[:5]
-
-            # --- 2. Extract Stats (Seeds/Size) ---
-            full_title = s.get('title', '')
-            bh = s.get('behaviorHints', {})
-            
-            size_str = ""
-            seed_str = ""
-
-            if bh.get('videoSize'):
-                size_str = format_size(bh.get('videoSize'))
-            
-            if s.get('seeds') is not None:
-                seed_str = str(s['seeds'])
-
-            # Regex Fallbacks
-            if not size_str:
-                size_match = re.search(r'(?:💾|📦|Size)\s?([\d\.]+\s?[KMGT]B)', full_title, re.IGNORECASE)
-                if size_match: 
-                    size_str = size_match.group(1)
-                else:
-                    loose_match = re.search(r'(\d+(?:\.\d+)?\s?[KMGT]B)', full_title)
-                    if loose_match: size_str = loose_match.group(1)
-
-            if not seed_str:
-                seed_match = re.search(r'(?:👤|👥|S:)\s?(\d+)', full_title)
-                if seed_match: seed_str = seed_match.group(1)
-
-            # --- 3. Clean Filename ---
-            if '\n' in full_title: 
-                filename = full_title.split('\n')[0]
-            else: 
-                filename = full_title
-            
-            if not filename: filename = bh.get('filename')
-            if not filename: filename = "Unknown Release"
-
-            # --- 4. Resolution Tag ---
-            check_str = (full_title + " " + raw_provider).lower()
-            res_tag = ""
-            res_color = "dim"
-            
-            if "2160p" in check_str or "4k" in check_str:
-                res_tag = "4K"
-                res_color = "bold gold1"
-            elif "1080p" in check_str:
-                res_tag = "1080p"
-                res_color = "bold green"
-            elif "720p" in check_str:
-                res_tag = "720p"
-                res_color = "green"
-            elif "480p" in check_str:
-                res_tag = "480p"
-                res_color = "yellow"
-            elif "cam" in check_str:
-                res_tag = "CAM"
-                res_color = "red"
-
-            # --- 5. Build Stats String ---
-            stats_parts = []
-            if size_str: stats_parts.append(f"💾 {size_str}")
-            if seed_str: stats_parts.append(f"👤 {seed_str}")
-            stats_display = "  ".join(stats_parts)
-
-            # --- 6. Smart Truncation ---
-            reserved_len = len(provider_tag) + 3 
-            if res_tag: reserved_len += len(res_tag) + 3
-            if stats_display: reserved_len += len(stats_display) + 3
-            
-            allowed_title_len = available_width - reserved_len
-            if allowed_title_len < 10: allowed_title_len = 10
-            
-            display_filename = filename.strip()
-            if len(display_filename) > allowed_title_len:
-                display_filename = display_filename[:allowed_title_len-1] + "…"
-
-            # --- 7. Construct Rich Text ---
-            final_text = Text()
-            final_text.append(f"[{provider_tag}] ", style="bold blue")
-            if res_tag: final_text.append(f"[{res_tag}] ", style=res_color)
-            
-            final_text.append(display_filename)
-            
-            if stats_display:
-                final_text.append(" | ", style="dim")
-                final_text.append(stats_display, style="cyan")
-
-            link = s.get('url') or s.get('infoHash')
-            if not link: continue
-            if not link.startswith("magnet") and not link.startswith("http"):
-                link = f"magnet:?xt=urn:btih:{link}"
-            
-            list_view.append(StreamItem(final_text, link))
-
-    def on_list_view_selected(self, message: ListView.Selected):
+        # The list is re-ranked as each provider answers (duplicates across
+        # addons merge into one row), keeping the cursor on the same stream.
+        # Cached answers show up first; a live answer replaces its addon's rows.
+        by_provider = {}
+        from_cache = {}  # provider -> age of the cached rows on screen
+        pending = {p['name'] for p in PROVIDERS}
+        found = hidden = 0
+        async for result in manager.iter_streams(self.type_, self.stremio_id):
+            name = result['name']
+            self.query_one("#provider_stats").update(self.format_provider_health())
+            if result.get('cached'):
+                from_cache[name] = result['age']
+                if result['fresh']: pending.discard(name)
+            else:
+                pending.discard(name)
+                # A failed refresh keeps the cached rows
+                if result.get('error') and name in by_provider: continue
+                from_cache.pop(name, None)
+            by_provider[name] = result['parsed']
+            ranked, hidden = manager.rank_streams([i for rows in by_provider.values() for i in rows])
+
+            current = list_view.highlighted_row
+            index = 0
+            if current is not None:
+                for i, info in enumerate(ranked):
+                    if info.link == current.link:
+                        index = i
+                        break
+            # Only the rows on screen get built, however many streams came back
+            # A `/` filter typed meanwhile stays on as more providers answer
+            list_view.set_rows(
+                ranked, lambda info: self.build_stream_item(info, available_width), index,
+                row_text=self.stream_label, keep_filter=True,
+            )
+            found = len(ranked)
+
+            if found or hidden:
+                loading.display = False
+                title_label.update(self.format_title(found, hidden, pending, from_cache))
+
+        loading.display = False
+        if not found and hidden:
+            title_label.update(f"No streams for {self.display_title} within the filters ({hidden} hidden)")
+        elif not found:
+            title_label.update(f"No streams found for {self.display_title}")
+        else:
+            title_label.update(self.format_title(found, hidden, (), from_cache))
+
+    def format_title(self, found, hidden, pending, from_cache):
+        extra = ""
+        if hidden: extra += f", {hidden} hidden by filters"
+        if from_cache: extra += f", cached {max(from_cache.values()) / 60:.0f}m ago"
+        if pending: extra += f", waiting on {len(pending)}"
+        return f"Select Stream: {self.display_title} ({found} found{extra})"
+
+    def format_provider_health(self):
+        parts = []
+        for h in self.app.manager.provider_health():
+            if h['open_for']:
+                parts.append(f"{h['name']}: paused {h['open_for']:.0f}s")
+            elif h['calls']:
+                parts.append(
+                    f"{h['name']}: p50 {h['p50']:.1f}s p95 {h['p95']:.1f}s "
+                    f"err {h['error_rate']:.0%} ~{h['avg_streams']:.0f} streams"
+                )
+        # Requests (HTTP, metadata, images) answered by one already in flight
+        stats = self.app.manager.coalescing_stats().values()
+        shared = sum(s['coalesced'] for s in stats)
+        if shared:
+            parts.append(f"shared {shared}/{shared + sum(s['calls'] for s in stats)} requests")
+        return "  |  ".join(parts)
+
+    @staticmethod
+    def stream_label(info):
+        return f"{info.provider_tag} {info.res_tag or ''} {info.filename}"
+
+    def build_stream_item(self, info, available_width):
+        """Lays out one pre-parsed StreamInfo as a StreamItem row."""
+        stats_display = info.stats_display
+
+        # --- Smart Truncation ---
+        reserved_len = len(info.provider_tag) + 3 
+        if info.res_tag: reserved_len += len(info.res_tag) + 3
+        if stats_display: reserved_len += len(stats_display) + 3
+        
+        allowed_title_len = available_width - reserved_len
+        if allowed_title_len < 10: allowed_title_len = 10
+        
+        display_filename = info.filename
+        if len(display_filename) > allowed_title_len:
+            display_filename = display_filename[:allowed_title_len-1] + "…"
+
+        # --- Construct Rich Text ---
+        final_text = Text()
+        final_text.append(f"[{info.provider_tag}] ", style="bold blue")
+        if info.res_tag: final_text.append(f"[{info.res_tag}] ", style=info.res_color)
+        
+        final_text.append(display_filename)
+        
+        if stats_display:
+            final_text.append(" | ", style="dim")
+            final_text.append(stats_display, style="cyan")
+
+        return StreamItem(final_text, info.link, info.file_idx)
+
+    async def on_list_view_selected(self, message: ListView.Selected):
         item = message.item
         link = item.link 
         
@@ -200,36 +196,11 @@ class StreamSelectScreen(Screen):
             "stream_link": link 
         })
         
+        if self.type_ == "series" and WARM_NEXT_EPISODE:
+            self.app.manager.warm_next_episode(
+                self.imdb_id, self.media_title, self.season, self.episode, self.seasons_map
+            )
+
         self.app.notify(f"Launching MPV (Disk Cache Enabled)...")
         
-        with self.app.suspend():
-            subprocess.run(["clear"]) 
-            
-            # --- FIX STARTS HERE ---
-            # 1. Define a persistent cache folder in your HOME directory (Physical Disk)
-            cache_root = Path.home() / ".cache" / "stremio-tui"
-            cache_root.mkdir(parents=True, exist_ok=True)
-
-            # 2. Create a modified environment for the subprocess
-            # This forces WebTorrent (and underlying Node process) to use the physical disk for temp files
-            my_env = os.environ.copy()
-            my_env["TMPDIR"] = str(cache_root)
-            my_env["TEMP"] = str(cache_root)
-            my_env["TMP"] = str(cache_root)
-
-            # 3. Create the temporary directory INSIDE the cache root
-            # dir=cache_root ensures it's created on the physical disk, not /tmp
-            with tempfile.TemporaryDirectory(prefix="stremio_", dir=cache_root) as tmp_dir:
-                print(f"Caching stream to: {tmp_dir}")
-                print("Folder will be deleted when player closes.")
-                
-                cmd = [
-                    "webtorrent", link,
-                    "--out", tmp_dir, 
-                    "--mpv", 
-                    "--player-args=--save-position-on-quit" 
-                ]
-                
-                # 4. Run with the custom environment
-                subprocess.run(cmd, env=my_env)
-            # --- FIX ENDS HERE ---
+        await self.app.launch_player(link, item.file_idx, self.display_title)
@@ -1,21 +1,397 @@
 # ui/widgets/vim_list.py
-from textual.widgets import ListView
+from textual.binding import Binding
+from textual.widget import Widget
+from textual.widgets import Input, ListView
 from ui.keybinds import NAV_BINDINGS
+from core.fuzzy import FuzzyIndex
+
+
+class _Spacer(Widget):
+    """Stands in for the rows above / below the mounted window."""
+    DEFAULT_CSS = """
+    _Spacer { width: 1fr; height: 0; }
+    """
+
 
 class VimListView(ListView):
-    """A ListView that supports Vim navigation keys by default."""
-    
+    """
+    A ListView that supports Vim navigation keys by default.
+
+    Besides append()/clear() it has a rows mode: set_rows(rows, make_item)
+    takes a backing sequence and a factory that turns one row into a
+    ListItem, and only the rows around the viewport are ever mounted (the
+    rest is an empty spacer of the same height). `index` is then the row
+    index, and Highlighted / Selected carry the mounted ListItem as usual.
+    All rows must be the same height; it is measured from the first one.
+
+    Given row_text (row -> label), `/` filters the rows fuzzily as you
+    type (see ListFilter); `rows` and `index` then refer to the matches.
+    """
+
     # Load bindings from the config file
     BINDINGS = NAV_BINDINGS
-    
+
+    # Optional core.prefetch.WindowPrefetcher, told about every cursor move
+    prefetcher = None
+
+    # Rows mode: rows kept mounted above and below the visible ones
+    OVERSCAN_ROWS = 5
+
+    def __init__(self, *children, **kwargs):
+        super().__init__(*children, **kwargs)
+        self._rows = None          # backing sequence in rows mode, None otherwise
+        self._make_item = None
+        self._row_height = 1       # lines per row, measured once mounted
+        self._window = (0, 0)      # [start, end) rows currently mounted
+        self._items = {}           # row index -> mounted ListItem
+        self._top = self._bottom = None
+        # Filtering (rows mode)
+        self._all_rows = None      # every row; _rows is the filtered view of it
+        self._row_text = None
+        self._fuzzy = None         # FuzzyIndex over _all_rows, built on first use
+        self._view = None          # _all_rows indexes shown, None when unfiltered
+        self._prefetch_base = None # the prefetcher's own items, while filtered
+        self.filter_query = ""
+        self._filter_from = None    # source row under the cursor when a re-filter was queued
+
+    # --- Rows mode ---
+    @property
+    def rows(self):
+        return self._rows
+
+    @property
+    def highlighted_row(self):
+        """The row under the cursor (rows mode), or None."""
+        if self._rows is None or self.index is None: return None
+        return self._rows[self.index]
+
+    def set_rows(self, rows, make_item, index=0, row_text=None, keep_filter=False):
+        """
+        Shows `rows` (any sequence), building a ListItem with make_item(row)
+        only for the rows in and near the viewport. `index` is the row to
+        highlight (None for no cursor). row_text(row) enables the `/` filter;
+        with keep_filter=True a filter already typed applies to the new rows.
+        """
+        self._all_rows = rows
+        self._make_item = make_item
+        self._row_text = row_text
+        self._fuzzy = None
+        # The caller has just given the prefetcher items for these rows
+        self._prefetch_base = None
+        if not keep_filter or row_text is None:
+            self._close_prompt()
+            self.filter_query = ""
+        # Showing the new rows applies any re-filter still queued
+        self._filter_from = None
+        self._show(index)
+
+    def _show(self, index, best_match=False):
+        """
+        Mounts the (filtered) rows from scratch, cursor on _all_rows[index]
+        (or on the best match, when filtering with best_match=True).
+        """
+        view = None
+        if self.filter_query:
+            view = self._fuzzy_index().search(self.filter_query)
+            if best_match or index is None:
+                index = 0 if best_match else None
+            else:
+                index = view.index(index) if index in view else 0
+        self._view = view
+        rows = self._all_rows if view is None else [self._all_rows[i] for i in view]
+        self._filter_prefetcher()
+
+        with self.app.batch_update():
+            self.remove_children()
+            self._rows = rows
+            self._items = {}
+            self._window = (0, 0)
+            self._top, self._bottom = _Spacer(), _Spacer()
+            self.mount(self._top, self._bottom)
+            self.scroll_to(y=0, animate=False)
+            # Reset quietly so the watcher (and Highlighted) fires even if index is unchanged
+            self.set_reactive(VimListView.index, None)
+            self._update_window(0, force=True)
+            if rows and index is not None:
+                self.index = index
+        self.call_after_refresh(self._measure_rows)
+
+    def extend_rows(self, rows):
+        """
+        Appends rows to the backing sequence. As with set_rows, the caller
+        gives the prefetcher items for all the rows (new ones included) first.
+        """
+        if self._rows is None: return
+        self._all_rows = list(self._all_rows) + list(rows)
+        self._fuzzy = None
+        self._prefetch_base = None
+        if self._view is not None:
+            self._show(self.source_index(self.index))
+            return
+        self._rows = self._all_rows
+        self._update_window(self._top_row(), force=True)
+        # New items may fall inside the window around the cursor
+        if self.prefetcher is not None and self.index is not None:
+            self.prefetcher.move(self.index)
+
+    def source_index(self, index):
+        """Position in the rows given to set_rows of the shown row `index`."""
+        if index is None or self._view is None: return index
+        return self._view[index]
+
+    # --- Filter (rows mode) ---
+    def _fuzzy_index(self):
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex([self._row_text(row) for row in self._all_rows])
+        return self._fuzzy
+
+    @property
+    def can_filter(self):
+        """Only lists shown with set_rows(..., row_text=...) can be filtered."""
+        return self._rows is not None and self._row_text is not None
+
+    def check_action(self, action, parameters):
+        # Elsewhere "/" is left to the app (focus the search box)
+        if action == "filter":
+            return self.can_filter
+        return True
+
+    def action_filter(self):
+        if not self.can_filter: return
+        try:
+            self.screen.query_one(ListFilter).focus()
+        except Exception:
+            self.screen.mount(ListFilter(self))
+
+    def apply_filter(self, query):
+        """Narrows the rows to fuzzy matches of `query`, best first ("" shows them all)."""
+        if self._all_rows is None or query == self.filter_query: return
+        # Keys typed before the next repaint are folded into one re-render
+        if self._filter_from is None:
+            self._filter_from = (self.source_index(self.index),)
+            self.call_after_refresh(self._refilter)
+        self.filter_query = query
+
+    def _refilter(self):
+        if self._filter_from is None: return
+        (current,), self._filter_from = self._filter_from, None
+        if self._all_rows is None: return
+        # Each keystroke puts the cursor on the best match; clearing goes back to the same row
+        self._show(current, best_match=bool(self.filter_query))
+
+    def close_filter(self, keep=False):
+        """Removes the `/` prompt; keep=False also drops the filter."""
+        self._close_prompt()
+        if not keep: self.apply_filter("")
+
+    def _close_prompt(self):
+        if not self.is_attached: return
+        for prompt in self.screen.query(ListFilter):
+            if prompt.list_view is self:
+                prompt.remove()
+                self.focus()
+
+    def _filter_prefetcher(self):
+        # The prefetcher's items are per row, so they're filtered along with the rows
+        if self.prefetcher is None: return
+        if self._view is None:
+            if self._prefetch_base is not None:
+                self.prefetcher.set_items(self._prefetch_base)
+                self._prefetch_base = None
+            return
+        if self._prefetch_base is None:
+            self._prefetch_base = list(self.prefetcher.items)
+        if len(self._prefetch_base) == len(self._all_rows):
+            self.prefetcher.set_items([self._prefetch_base[i] for i in self._view])
+
+    def _top_row(self):
+        return int(self.scroll_y // self._row_height)
+
+    def _page(self):
+        lines = self.scrollable_content_region.height or self.app.size.height
+        return max(1, lines // self._row_height)
+
+    def _make_row(self, i):
+        item = self._make_item(self._rows[i])
+        item.row_index = i
+        if i == self.index:
+            item.highlighted = True
+        return item
+
+    def _update_window(self, top_row, force=False):
+        """Makes sure the rows visible from `top_row` down are mounted."""
+        total = len(self._rows)
+        page = self._page()
+        start, end = self._window
+        if not force and start <= top_row and min(total, top_row + page) <= end:
+            return
+
+        # Re-centre with some slack on either side, reusing what's already mounted
+        start = max(0, top_row - self.OVERSCAN_ROWS)
+        end = min(total, top_row + page + self.OVERSCAN_ROWS)
+        keep = {i: item for i, item in self._items.items() if start <= i < end}
+        drop = [item for i, item in self._items.items() if i not in keep]
+        if drop: self.remove_children(drop)
+
+        low, high = (min(keep), max(keep) + 1) if keep else (start, start)
+        head = [self._make_row(i) for i in range(start, low)]
+        tail = [self._make_row(i) for i in range(high, end)]
+        if head: self.mount_all(head, after=self._top)
+        if tail: self.mount_all(tail, before=self._bottom)
+
+        keep.update(zip(range(start, low), head))
+        keep.update(zip(range(high, end), tail))
+        self._items = keep
+        self._window = (start, end)
+        self._top.styles.height = start * self._row_height
+        self._bottom.styles.height = (total - end) * self._row_height
+
+    def _measure_rows(self):
+        if self._rows is None or not self._items: return
+        height = next(iter(self._items.values())).outer_size.height
+        if height and height != self._row_height:
+            self._row_height = height
+            self._update_window(self._top_row(), force=True)
+            if self.index is not None:
+                self._scroll_to_row(self.index)
+
+    def _scroll_to_row(self, i):
+        """Scrolls just enough to bring row i into view."""
+        height = self._row_height
+        view = self.scrollable_content_region.height or self._page() * height
+        y = self.scroll_y
+        if i * height < y:
+            y = i * height
+        elif (i + 1) * height > y + view:
+            y = (i + 1) * height - view
+        self._update_window(int(y // height))
+        if y != self.scroll_y:
+            # After a layout, so a new spacer height doesn't clamp the scroll
+            self.call_after_refresh(self.scroll_to, y=y, animate=False)
+
+    def on_resize(self, event):
+        if self._rows is not None:
+            self._update_window(self._top_row())
+
+    def watch_scroll_y(self, old_value, new_value):
+        super().watch_scroll_y(old_value, new_value)
+        if self._rows is not None:
+            self._update_window(self._top_row())
+
+    # --- ListView overrides (rows mode) ---
+    @property
+    def highlighted_child(self):
+        if self._rows is None: return super().highlighted_child
+        if self.index is None: return None
+        return self._items.get(self.index)
+
+    def validate_index(self, index):
+        if self._rows is None: return super().validate_index(index)
+        if index is None or not self._rows: return None
+        return max(0, min(index, len(self._rows) - 1))
+
+    def watch_index(self, old_index, new_index):
+        if self._rows is None:
+            super().watch_index(old_index, new_index)
+        else:
+            old_item = self._items.get(old_index)
+            if old_item is not None: old_item.highlighted = False
+            item = None
+            if new_index is not None:
+                self._scroll_to_row(new_index)
+                item = self._items.get(new_index)
+                if item is not None: item.highlighted = True
+            self.post_message(self.Highlighted(self, item))
+        if self.prefetcher is not None:
+            self.prefetcher.move(new_index)
+
+    def clear(self):
+        if self._rows is None: return super().clear()
+        self._close_prompt()
+        self.filter_query = ""
+        self._filter_from = None
+        await_remove = self.remove_children()
+        self.index = None
+        self._rows = self._all_rows = self._view = self._fuzzy = None
+        self._items = {}
+        self._window = (0, 0)
+        return await_remove
+
+    def action_cursor_down(self):
+        if self._rows is None: return super().action_cursor_down()
+        if self._rows:
+            self.index = 0 if self.index is None else self.index + 1
+
+    def action_cursor_up(self):
+        if self._rows is None: return super().action_cursor_up()
+        if self._rows:
+            self.index = len(self._rows) - 1 if self.index is None else self.index - 1
+
+    def _on_list_item__child_clicked(self, event):
+        if self._rows is None: return super()._on_list_item__child_clicked(event)
+        event.stop()
+        self.focus()
+        self.index = event.item.row_index
+        self.post_message(self.Selected(self, event.item, self.index))
+
+    def __len__(self):
+        if self._rows is None: return super().__len__()
+        return len(self._rows)
+
     def action_go_top(self):
         """Move cursor to the first item."""
-        if self.children:
+        if self._rows is not None:
+            if self._rows: self.index = 0
+        elif self.children:
             self.index = 0
             self.scroll_to_widget(self.children[0])
 
     def action_go_bottom(self):
         """Move cursor to the last item."""
-        if self.children:
+        if self._rows is not None:
+            if self._rows: self.index = len(self._rows) - 1
+        elif self.children:
             self.index = len(self.children) - 1
             self.scroll_to_widget(self.children[-1])
+
+
+class ListFilter(Input):
+    """
+    The `/` prompt of a VimListView: narrows the list as you type. Enter
+    goes back to the (filtered) list, Escape drops the filter; up / down
+    move the list cursor without leaving the prompt.
+    """
+    DEFAULT_CSS = """
+    ListFilter { dock: bottom; }
+    """
+
+    BINDINGS = [
+        Binding("escape", "cancel", "Clear Filter", show=False),
+        Binding("down", "list_down", "Down", show=False),
+        Binding("up", "list_up", "Up", show=False),
+    ]
+
+    def __init__(self, list_view):
+        super().__init__(value=list_view.filter_query, placeholder="/ Filter this list...")
+        self.list_view = list_view
+
+    def on_mount(self):
+        self.focus()
+
+    def on_input_changed(self, message: Input.Changed):
+        # Not a search; keep it away from the app's search box handlers
+        message.stop()
+        self.list_view.apply_filter(message.value)
+
+    def on_input_submitted(self, message: Input.Submitted):
+        message.stop()
+        self.list_view.close_filter(keep=True)
+
+    def action_cancel(self):
+        self.list_view.close_filter()
+
+    def action_list_down(self):
+        self.list_view.action_cursor_down()
+
+    def action_list_up(self):
+        self.list_view.action_cursor_up()